@@ -1,5 +1,9 @@
+import math
+
 import numpy as np
 
+from landmarks import PoseFrame
+
 
 def calculate_angle(a, b, c):
     # Computes the angle at point b between rays b→a and b→c (2D)
@@ -100,6 +104,52 @@ def calculate_knee_deviation_3d(knee_3d, ankle_3d, hip_3d):
     return round(sign * deviation_magnitude, 4)
 
 
+def squat_metrics(lm):
+    """
+    Per-frame fast path: knee angle (3D), back angle (2D, pixels) and knee deviation (3D)
+    from one PoseFrame in a single pass of plain float math.
+
+    Same results as calculate_angle_3d / calculate_back_angle / calculate_knee_deviation_3d,
+    without creating any intermediate NumPy objects. Returns (knee_angle, back_angle, knee_dev).
+    """
+    sx, sy, _, hx, hy, hz, kx, ky, kz, ax, ay, az = lm.leg_points()
+
+    # Knee angle between knee→hip and knee→ankle
+    v1x, v1y, v1z = hx - kx, hy - ky, hz - kz
+    v2x, v2y, v2z = ax - kx, ay - ky, az - kz
+    n1 = math.sqrt(v1x * v1x + v1y * v1y + v1z * v1z)
+    n2 = math.sqrt(v2x * v2x + v2y * v2y + v2z * v2z)
+    if n1 * n2 > 0.0:
+        cos_a = (v1x * v2x + v1y * v2y + v1z * v2z) / (n1 * n2)
+        knee_angle = round(math.degrees(math.acos(min(1.0, max(-1.0, cos_a)))), 2)
+    else:
+        knee_angle = float("nan")
+
+    # Back lean relative to image vertical (0, -1), on truncated pixel coords like PoseFrame.px
+    w, h   = lm.width, lm.height
+    bx, by = int(sx * w) - int(hx * w), int(sy * h) - int(hy * h)
+    bn = math.sqrt(bx * bx + by * by)
+    if bn > 0.0:
+        back_angle = round(math.degrees(math.acos(min(1.0, max(-1.0, -by / bn)))), 2)
+    else:
+        back_angle = float("nan")
+
+    # Knee offset from the ankle→hip axis
+    lx, ly, lz = hx - ax, hy - ay, hz - az
+    ln = math.sqrt(lx * lx + ly * ly + lz * lz)
+    if ln < 1e-6:
+        knee_dev = 0.0
+    else:
+        lx, ly, lz = lx / ln, ly / ln, lz / ln
+        qx, qy, qz = kx - ax, ky - ay, kz - az
+        d = qx * lx + qy * ly + qz * lz
+        dx, dy, dz = qx - d * lx, qy - d * ly, qz - d * lz
+        mag = math.sqrt(dx * dx + dy * dy + dz * dz)
+        knee_dev = round(mag if dx >= 0 else -mag, 4)
+
+    return knee_angle, back_angle, knee_dev
+
+
 def estimate_camera_angle(landmarks_3d):
     """
     Estimates camera angle from the Z-depth difference between hips.
@@ -117,27 +167,101 @@ def estimate_camera_angle(landmarks_3d):
 
 def get_best_leg(results, current_leg: str = "left", switch_threshold: float = 0.15) -> str:
     """
-    Returns the leg with better joint visibility.
+    Returns the leg with better joint visibility. Accepts a MediaPipe result or a PoseFrame.
     switch_threshold prevents flickering when both legs are similarly visible.
     """
-    if not results.pose_landmarks or len(results.pose_landmarks) == 0:
-        return current_leg
+    if isinstance(results, PoseFrame):
+        vis = results.data[:, 3]
+        left_visibility  = float(vis[23] + vis[25] + vis[27]) / 3
+        right_visibility = float(vis[24] + vis[26] + vis[28]) / 3
+    else:
+        if not results.pose_landmarks or len(results.pose_landmarks) == 0:
+            return current_leg
 
-    landmarks = results.pose_landmarks[0]
+        landmarks = results.pose_landmarks[0]
 
-    left_visibility = (
-        landmarks[23].visibility +
-        landmarks[25].visibility +
-        landmarks[27].visibility
-    ) / 3
+        left_visibility = (
+            landmarks[23].visibility +
+            landmarks[25].visibility +
+            landmarks[27].visibility
+        ) / 3
 
-    right_visibility = (
-        landmarks[24].visibility +
-        landmarks[26].visibility +
-        landmarks[28].visibility
-    ) / 3
+        right_visibility = (
+            landmarks[24].visibility +
+            landmarks[26].visibility +
+            landmarks[28].visibility
+        ) / 3
 
     if current_leg == "left":
         return "right" if right_visibility > left_visibility + switch_threshold else "left"
     else:
-        return "left" if left_visibility > right_visibility + switch_threshold else "right"
\ No newline at end of file
+        return "left" if left_visibility > right_visibility + switch_threshold else "right"
+
+# Batch variants — operate on (N, 3) / (N, 2) arrays, one row per frame or leg
+
+def _rowwise_dot(a, b):
+    return np.einsum('ij,ij->i', a, b)
+
+
+def calculate_angle_3d_batch(a, b, c):
+    """
+    Vectorized calculate_angle_3d. a, b, c are (N, 3) arrays of points;
+    returns an (N,) array of angles at b in degrees. Degenerate rows give NaN.
+    """
+    vec1 = np.asarray(a, dtype=np.float64) - b
+    vec2 = np.asarray(c, dtype=np.float64) - b
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos_angle = _rowwise_dot(vec1, vec2) / (np.linalg.norm(vec1, axis=1) * np.linalg.norm(vec2, axis=1))
+    angle = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+    return np.round(angle, 2)
+
+
+def calculate_back_angle_batch(shoulder, hip):
+    """Vectorized calculate_back_angle over (N, 2) pixel coords."""
+    vector = np.asarray(shoulder, dtype=np.float64) - hip
+    norm   = np.linalg.norm(vector, axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos_angle = -vector[:, 1] / norm  # dot with vertical (0, -1)
+    angle = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+    return np.round(angle, 2)
+
+
+def calculate_back_angle_3d_batch(shoulder_3d, hip_3d):
+    """Vectorized calculate_back_angle_3d over (N, 3) arrays. Degenerate rows give 0."""
+    vector = np.asarray(shoulder_3d, dtype=np.float64) - hip_3d
+    norm   = np.linalg.norm(vector, axis=1)
+    valid  = norm >= 1e-6
+
+    cos_angle = np.divide(-vector[:, 1], norm, out=np.zeros_like(norm), where=valid)
+    angle     = np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+    angle[~valid] = 0.0
+
+    return np.round(angle, 2)
+
+
+def calculate_knee_deviation_3d_batch(knee_3d, ankle_3d, hip_3d):
+    """
+    Vectorized calculate_knee_deviation_3d over (N, 3) arrays.
+    Returns an (N,) array, negative for inward cave; degenerate legs give 0.
+    """
+    ankle    = np.asarray(ankle_3d, dtype=np.float64)
+    leg_axis = hip_3d - ankle
+    knee_vec = knee_3d - ankle
+
+    axis_norm = np.linalg.norm(leg_axis, axis=1)
+    valid     = axis_norm >= 1e-6
+    leg_unit  = np.divide(leg_axis, axis_norm[:, None], out=np.zeros_like(leg_axis), where=valid[:, None])
+
+    # Remove the component along the leg axis; what is left is the lateral offset
+    deviation = knee_vec - _rowwise_dot(knee_vec, leg_unit)[:, None] * leg_unit
+    magnitude = np.linalg.norm(deviation, axis=1)
+    sign      = np.where(deviation[:, 0] >= 0, 1.0, -1.0)
+
+    result = sign * magnitude
+    result[~valid] = 0.0
+
+    return np.round(result, 4)
@@ -0,0 +1,299 @@
+"""
+AI Fitness Coach — headless batch analysis of recorded sets
+Run: python batch_analyzer.py set1.mp4 set2.avi ... [-o results] [-j 4]
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from angle_calculator import (calculate_angle_3d_batch, calculate_back_angle_batch,
+    calculate_knee_deviation_3d_batch, get_best_leg)
+from landmarks import LEG_INDICES, NUM_LANDMARKS, OneEuroFilter, PoseFrame
+from landmark_recording import REPLAY_EXT, LandmarkReplay, is_recording
+from rep_counter import REP, SHALLOW_REP, RepCounter, thresholds
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".wmv", ".flv", REPLAY_EXT)
+
+# Same defaults and limits as the desktop app uses for uncalibrated video files
+DEFAULT_STANDING = 140.0
+DEFAULT_SQUAT    = 90.0
+BACK_LIM         = 35
+KNEE_LIM         = 0.15
+
+# One detector per pool process, created by _init_process
+_detector = None
+
+
+def _init_process():
+    global _detector
+    from pose_detector import PoseDetector
+    # Parallelism comes from the pool; keep OpenCV from oversubscribing cores
+    cv2.setNumThreads(1)
+    _detector = PoseDetector(0.7, 0.7)
+
+
+def _detect_video(path, record_path=None):
+    """Pass 1 for video files: inference only, landmark arrays are collected for batch math."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+
+    src_fps = cap.get(cv2.CAP_PROP_FPS)
+    fps     = src_fps if src_fps > 0 else 30.0
+    _detector.reset()  # the pool process reuses its detector for every file
+    _detector.set_fps(fps)
+    if record_path:
+        _detector.start_recording(record_path)
+
+    current_leg = "left"
+    frame_nos   = []   # 1-based frame number of every frame with a detected pose
+    poses       = []   # (33, 4) landmark arrays of those frames
+    legs        = []   # True where the right leg was selected
+    frames      = 0
+    width = height = 1
+
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames += 1
+
+        results = _detector.process_frame(frame)
+        lm      = _detector.get_landmarks(results, frame.shape, leg=current_leg)
+        if lm:
+            current_leg = get_best_leg(lm, current_leg)
+            frame_nos.append(frames)
+            poses.append(lm.data.copy())
+            legs.append(current_leg == "right")
+            width, height = lm.width, lm.height
+
+    cap.release()
+    if record_path:
+        _detector.stop_recording()
+
+    P = np.stack(poses) if poses else np.zeros((0, NUM_LANDMARKS, 4), np.float32)
+    return fps, frames, frame_nos, P, legs, width, height
+
+
+def _load_recording(path):
+    """Pass 1 for .lmk recordings: no model, landmarks come straight from the memory map."""
+    replay    = LandmarkReplay(path)
+    frame_nos = (np.flatnonzero(replay.present) + 1).tolist()
+    P         = np.asarray(replay.landmarks[replay.present])
+
+    # Leg choice has hysteresis, so it stays a sequential scan
+    pose, legs, current_leg = PoseFrame(), [], "left"
+    for data in P:
+        pose.data   = data
+        current_leg = get_best_leg(pose, current_leg)
+        legs.append(current_leg == "right")
+
+    return replay.fps, len(replay), frame_nos, P, legs, replay.width, replay.height
+
+
+def analyze_video(path, standing=DEFAULT_STANDING, squatting=DEFAULT_SQUAT, record_path=None):
+    """
+    Runs pose detection and the rep counter over one video file, or over a .lmk
+    recording without the model. Nothing is drawn.
+    """
+    t0 = time.time()
+    if is_recording(path):
+        data = _load_recording(path)
+    else:
+        data = _detect_video(path, record_path)
+    if data is None:
+        return {"file": path, "error": "cannot open video"}
+    fps, frames, frame_nos, P, legs, width, height = data
+
+    UP_THRESH, DN_THRESH = thresholds(standing, squatting)
+
+    # Pass 2: landmark smoothing (sequential, as in Worker.run), then every angle
+    # of the video in a few array ops
+    detected = len(frame_nos)
+    if detected:
+        P        = P.astype(np.float64)
+        smoother = OneEuroFilter()
+        prev_no  = 0
+        for i, frame_no in enumerate(frame_nos):
+            # Smoothing restarts after frames without a pose
+            if frame_no != prev_no + 1:
+                smoother.reset()
+            prev_no = frame_no
+            P[i] = smoother(P[i], 1.0 / fps)
+
+        rows  = np.arange(detected)
+        right = np.asarray(legs)
+        sh, hp, kn, an = (np.where(right, r, l) for l, r in zip(LEG_INDICES["left"], LEG_INDICES["right"]))
+
+        hip3, knee3, ankle3 = P[rows, hp, :3], P[rows, kn, :3], P[rows, an, :3]
+        # Pixel coords truncated like PoseFrame.px, so results match the live app
+        scale = np.array([width, height], dtype=np.float64)
+        sh2   = np.trunc(P[rows, sh, :2] * scale)
+        hip2  = np.trunc(P[rows, hp, :2] * scale)
+
+        knee_arr   = calculate_angle_3d_batch(hip3, knee3, ankle3)
+        back_arr   = calculate_back_angle_batch(sh2, hip2)
+        knee_devs  = calculate_knee_deviation_3d_batch(knee3, ankle3, hip3)
+    else:
+        knee_arr = back_arr = knee_devs = np.empty(0)
+
+    # Pass 3: rep counter over the whole angle series at once
+    counter      = RepCounter(UP_THRESH, DN_THRESH)
+    events, down = counter.run(knee_arr, np.asarray(frame_nos, dtype=np.int64))
+
+    def log(kind):
+        return [{"frame": e.t, "time_s": round(e.t / fps, 2), "min_angle": round(e.min_angle, 1)}
+                for e in events if e.kind == kind]
+
+    reps, shallow = log(REP), log(SHALLOW_REP)
+
+    # Form warnings count on frames that arrive while already in DOWN, as in Worker.run
+    was_down    = np.concatenate(([False], down[:-1])) if detected else down
+    warn_frames = {"Round back":      int(np.count_nonzero(was_down & (back_arr > BACK_LIM))),
+                   "Knees caving in": int(np.count_nonzero(was_down & (knee_devs < -KNEE_LIM)))}
+
+    elapsed = time.time() - t0
+
+    def stats(values):
+        if not values:
+            return None
+        a = np.asarray(values, dtype=np.float64)
+        return {"min": round(float(a.min()), 1), "max": round(float(a.max()), 1),
+                "mean": round(float(a.mean()), 1)}
+
+    return {
+        "file":          path,
+        "frames":        frames,
+        "fps":           round(fps, 2),
+        "duration_s":    round(frames / fps, 2),
+        "detected_pct":  round(100.0 * detected / frames, 1) if frames else 0.0,
+        "up_thresh":     UP_THRESH,
+        "dn_thresh":     DN_THRESH,
+        "reps":          counter.counter,
+        "rep_log":       reps,
+        "shallow_reps":  shallow,
+        "knee_angle":    stats(knee_arr.tolist()),
+        "back_angle":    stats(back_arr.tolist()),
+        "warning_frames": warn_frames,
+        "process_s":     round(elapsed, 2),
+        "speed_x":       round(frames / fps / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def collect_inputs(paths):
+    """Expands directories and glob patterns into a sorted list of video files."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files += [os.path.join(p, f) for f in os.listdir(p) if f.lower().endswith(VIDEO_EXTS)]
+        else:
+            files += glob.glob(p) or [p]
+    return sorted(set(files))
+
+
+def output_stems(files, out_dir):
+    """
+    Unique output path (without extension) for every input file. The first input
+    named "set" writes set.json; another "set" (other folder or extension) gets its
+    extension appended, then a counter: set_lmk.json, set_mp4-2.json. No stem's
+    .json or .lmk is an input file.
+    """
+    taken = {os.path.abspath(f) for f in files}
+    stems = {}
+    for f in files:
+        name, ext = os.path.splitext(os.path.basename(f))
+        alt   = f"{name}_{ext.lstrip('.')}" if ext else name
+        cands = itertools.chain((name, alt), (f"{alt}-{n}" for n in itertools.count(2)))
+        for cand in cands:
+            stem = os.path.join(out_dir, cand)
+            outs = {os.path.abspath(stem + ".json"), os.path.abspath(stem + REPLAY_EXT)}
+            if not outs & taken:
+                break
+        taken |= outs
+        stems[f] = stem
+    return stems
+
+
+def run_batch(files, out_dir, workers=None, standing=DEFAULT_STANDING, squatting=DEFAULT_SQUAT,
+              record=False):
+    """
+    Shards files across a process pool and writes one JSON summary per file.
+    With record=True the landmarks of every video are also saved as <name>.lmk for replay.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers   = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    summaries = []
+
+    # Recordings alone never need the model. Otherwise fetch it once here: pool
+    # processes starting together would all download it to the same file
+    init = _init_process if any(not is_recording(f) for f in files) else None
+    if init:
+        from pose_detector import ensure_model
+        ensure_model()
+
+    stems   = output_stems(files, out_dir)
+    written = set()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init) as pool:
+        futures = {
+            pool.submit(analyze_video, f, standing, squatting,
+                        stems[f] + REPLAY_EXT if record and not is_recording(f) else None): f
+            for f in files
+        }
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                summary = fut.result()
+            except Exception as e:
+                summary = {"file": path, "error": str(e)}
+            summaries.append(summary)
+
+            out = stems[path] + ".json"
+            if out in written:
+                raise RuntimeError(f"{out} was already written in this run")
+            written.add(out)
+            with open(out, "w", encoding="utf-8") as fh:
+                json.dump(summary, fh, indent=2)
+
+            if "error" in summary:
+                print(f"[FAIL] {path}: {summary['error']}")
+            else:
+                print(f"[DONE] {path}: {summary['reps']} reps, "
+                      f"{len(summary['shallow_reps'])} shallow, {summary['speed_x']}x realtime")
+    return summaries
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless squat analysis of recorded videos.")
+    ap.add_argument("inputs", nargs="+", help="video files or .lmk recordings, directories or glob patterns")
+    ap.add_argument("-o", "--out", default="results", help="output directory for JSON summaries")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    ap.add_argument("--standing", type=float, default=DEFAULT_STANDING, help="calibrated standing knee angle")
+    ap.add_argument("--squat",    type=float, default=DEFAULT_SQUAT,    help="calibrated squat knee angle")
+    ap.add_argument("--record",   action="store_true", help="also save landmarks as .lmk for fast re-analysis")
+    args = ap.parse_args(argv)
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No video files found.")
+        return 1
+
+    t0 = time.time()
+    summaries = run_batch(files, args.out, args.jobs, args.standing, args.squat, args.record)
+    failed = sum(1 for s in summaries if "error" in s)
+    print(f"\n{len(files) - failed}/{len(files)} files analysed in {time.time() - t0:.1f}s → {args.out}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
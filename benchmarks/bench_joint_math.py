@@ -0,0 +1,63 @@
+"""
+Micro-benchmark: per-frame joint math
+Run: python benchmarks/bench_joint_math.py [-n 20000]
+
+Compares squat_metrics() against the three NumPy-based scalar functions it
+replaces in the analysis loop, on the same synthetic PoseFrames.
+"""
+import argparse
+import timeit
+
+from common import make_landmarks
+
+from angle_calculator import (calculate_angle_3d, calculate_back_angle,
+    calculate_knee_deviation_3d, squat_metrics)
+
+# Allowed |fast - numpy| per metric: the NumPy knee angle works in float32 and can
+# round to the neighbouring 0.01 deg; back angle and knee_dev come out identical
+TOLERANCE = (0.011, 1e-6, 1e-6)
+
+
+def numpy_path(lms):
+    for lm in lms:
+        calculate_angle_3d(lm.hip_3d, lm.knee_3d, lm.ankle_3d)
+        calculate_back_angle(lm.shoulder, lm.hip)
+        calculate_knee_deviation_3d(lm.knee_3d, lm.ankle_3d, lm.hip_3d)
+
+
+def fast_path(lms):
+    for lm in lms:
+        squat_metrics(lm)
+
+
+def bench(fn, lms, repeat):
+    best = min(timeit.repeat(lambda: fn(lms), number=1, repeat=repeat))
+    return best / len(lms) * 1e6  # µs per frame
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-n", type=int, default=20000, help="frames per run")
+    ap.add_argument("-r", "--repeat", type=int, default=5, help="runs; the best one is reported")
+    args = ap.parse_args(argv)
+
+    lms = make_landmarks(args.n)
+
+    # Both paths must agree before their speed means anything
+    for lm in lms[:1000]:
+        ref = (calculate_angle_3d(lm.hip_3d, lm.knee_3d, lm.ankle_3d),
+               calculate_back_angle(lm.shoulder, lm.hip),
+               calculate_knee_deviation_3d(lm.knee_3d, lm.ankle_3d, lm.hip_3d))
+        got = squat_metrics(lm)
+        assert all(abs(a - b) <= tol for a, b, tol in zip(got, ref, TOLERANCE)), (got, ref)
+
+    t_np   = bench(numpy_path, lms, args.repeat)
+    t_fast = bench(fast_path, lms, args.repeat)
+
+    print(f"numpy functions : {t_np:8.2f} us/frame")
+    print(f"squat_metrics   : {t_fast:8.2f} us/frame")
+    print(f"speed-up        : {t_np / t_fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
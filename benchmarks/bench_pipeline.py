@@ -0,0 +1,220 @@
+"""
+Per-frame pipeline benchmark suite
+Run: python benchmarks/bench_pipeline.py [--res 480p 720p 1080p] [--landmarks set.lmk] [-o bench.json]
+
+Times every per-frame stage offline, on synthetic frames and synthetic or recorded landmarks:
+  detector  PoseDetector.process_frame (needs pose_landmarker_full.task in the repo root) and get_landmarks
+  math      each angle_calculator function
+  overlay   each UIRenderer.draw_* method and the skeleton
+  display   FrameScaler.convert and VideoWidget painting (offscreen Qt, skipped without PyQt6)
+  web       JPEG encoding as done by the web preview stream
+"""
+import argparse
+import itertools
+import os
+import sys
+from types import SimpleNamespace
+
+from common import (REPO_ROOT, RESOLUTIONS, load_landmarks, machine_info, make_landmarks,
+    synthetic_frame, time_call, write_json)
+
+import cv2
+import numpy as np
+
+import angle_calculator as ac
+from landmarks import PoseFrame, draw_skeleton
+from ui_renderer import UIRenderer
+
+MODEL_FILE = os.path.join(REPO_ROOT, "pose_landmarker_full.task")
+
+
+def detector_cases(frame, poses):
+    try:
+        from mediapipe.tasks.python import vision
+        from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+        from pose_detector import PoseDetector
+    except ImportError as e:
+        return [], [("detector", f"mediapipe not available: {e}")]
+
+    cases, skipped = [], []
+
+    detector = None
+    if os.path.exists(MODEL_FILE):
+        cwd = os.getcwd()
+        os.chdir(REPO_ROOT)  # PoseDetector loads the model from the working directory
+        try:
+            detector = PoseDetector(0.7, 0.7)
+        finally:
+            os.chdir(cwd)
+        detector.set_fps(30)
+        cases.append(("detector", "process_frame", lambda: detector.process_frame(frame)))
+    else:
+        skipped.append(("detector.process_frame", f"model file not found: {MODEL_FILE}"))
+
+    # get_landmarks only touches the detector's PoseFrame, so it runs without a model
+    results = [vision.PoseLandmarkerResult(
+                   pose_landmarks=[[NormalizedLandmark(x=float(x), y=float(y), z=float(z), visibility=float(v))
+                                    for x, y, z, v in p.data]],
+                   pose_world_landmarks=[])
+               for p in poses[:64]]
+    holder = detector or SimpleNamespace(_pose=PoseFrame())
+    nxt    = itertools.cycle(results).__next__
+    cases.append(("detector", "get_landmarks",
+                  lambda: PoseDetector.get_landmarks(holder, nxt(), frame.shape)))
+    return cases, skipped
+
+
+def math_cases(poses):
+    nxt = itertools.cycle(poses).__next__
+    hip3   = np.stack([p.hip_3d for p in poses]).astype(np.float64)
+    knee3  = np.stack([p.knee_3d for p in poses]).astype(np.float64)
+    ankle3 = np.stack([p.ankle_3d for p in poses]).astype(np.float64)
+    sh3    = np.stack([p.shoulder_3d for p in poses]).astype(np.float64)
+    sh2    = np.array([p.shoulder for p in poses], np.float64)
+    hip2   = np.array([p.hip for p in poses], np.float64)
+    rows   = len(poses)
+
+    def one(fn):
+        return lambda: fn(nxt())
+
+    return [
+        ("math", "calculate_angle",             one(lambda p: ac.calculate_angle(p.hip, p.knee, p.ankle))),
+        ("math", "calculate_angle_3d",          one(lambda p: ac.calculate_angle_3d(p.hip_3d, p.knee_3d, p.ankle_3d))),
+        ("math", "calculate_back_angle",        one(lambda p: ac.calculate_back_angle(p.shoulder, p.hip))),
+        ("math", "calculate_back_angle_3d",     one(lambda p: ac.calculate_back_angle_3d(p.shoulder_3d, p.hip_3d))),
+        ("math", "calculate_knee_deviation_3d", one(lambda p: ac.calculate_knee_deviation_3d(p.knee_3d, p.ankle_3d, p.hip_3d))),
+        ("math", "squat_metrics",               one(ac.squat_metrics)),
+        ("math", "estimate_camera_angle",       one(lambda p: ac.estimate_camera_angle(
+                                                    {"left_hip_z": p.left_hip_z, "right_hip_z": p.right_hip_z}))),
+        ("math", "get_best_leg",                one(lambda p: ac.get_best_leg(p, "left"))),
+        ("math", f"calculate_angle_3d_batch[{rows}]",
+                 lambda: ac.calculate_angle_3d_batch(hip3, knee3, ankle3)),
+        ("math", f"calculate_back_angle_batch[{rows}]",
+                 lambda: ac.calculate_back_angle_batch(sh2, hip2)),
+        ("math", f"calculate_back_angle_3d_batch[{rows}]",
+                 lambda: ac.calculate_back_angle_3d_batch(sh3, hip3)),
+        ("math", f"calculate_knee_deviation_3d_batch[{rows}]",
+                 lambda: ac.calculate_knee_deviation_3d_batch(knee3, ankle3, hip3)),
+    ]
+
+
+def overlay_cases(frame, poses):
+    r    = UIRenderer()
+    p    = poses[0]
+    h, w = frame.shape[:2]
+    warn = ["Round back", "Knees caving in"]
+    return [
+        ("overlay", "draw_skeleton",            lambda: draw_skeleton(frame, p)),
+        ("overlay", "draw_joint_lines",         lambda: r.draw_joint_lines(frame, p.hip, p.knee, p.ankle, r.C_NEON)),
+        ("overlay", "draw_angle",               lambda: r.draw_angle(frame, p.knee, 95.0, r.C_NEON)),
+        ("overlay", "draw_header",              lambda: r.draw_header(frame, 12, "DOWN")),
+        ("overlay", "draw_feedback",            lambda: r.draw_feedback(frame, "Go deeper", r.C_AMBER)),
+        ("overlay", "draw_back_angle",          lambda: r.draw_back_angle(frame, 22, True)),
+        ("overlay", "draw_form_warnings",       lambda: r.draw_form_warnings(frame, warn)),
+        ("overlay", "draw_camera_warning",      lambda: r.draw_camera_warning(frame, 30)),
+        ("overlay", "draw_angle_bar",           lambda: r.draw_angle_bar(frame, 120, 140, 100)),
+        ("overlay", "draw_fps",                 lambda: r.draw_fps(frame, 30)),
+        ("overlay", "draw_button",              lambda: r.draw_button(frame, "START", w//2-180, h//2, w//2+180, h//2+60)),
+        ("overlay", "draw_source_selection",    lambda: r.draw_source_selection(frame)),
+        ("overlay", "draw_calibration_overlay", lambda: r.draw_calibration_overlay(frame, "UP", 3)),
+    ]
+
+
+def display_cases(frame, display_size):
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        from main import VideoWidget
+    except ImportError as e:
+        return [], [("display", f"PyQt6 not available: {e}")]
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    widget = VideoWidget()
+    widget.resize(*display_size)
+    widget.show()
+    app.processEvents()
+    display_cases.keep = (app, widget)  # keep Qt objects alive for the run
+
+    def show_and_paint():
+        widget.show_frame(widget.scaler.convert(frame))
+        widget.repaint()
+
+    return [
+        ("display", "FrameScaler.convert", lambda: widget.scaler.convert(frame)),
+        ("display", "VideoWidget.show_frame+paint", show_and_paint),
+    ], []
+
+
+def web_cases(frame):
+    params = [cv2.IMWRITE_JPEG_QUALITY, 80]
+    return [("web", "jpeg_encode_q80", lambda: cv2.imencode(".jpg", frame, params))]
+
+
+def run(resolutions, poses, iterations, budget_s, display_size, groups):
+    results, skipped = [], []
+    for res in resolutions:
+        w, h  = RESOLUTIONS[res]
+        base  = synthetic_frame(w, h)
+        frame = base.copy()
+        for p in poses:
+            p.width, p.height = w, h
+
+        cases = []
+        if "detector" in groups:
+            c, s = detector_cases(base, poses); cases += c; skipped += s
+        if "math" in groups:
+            cases += math_cases(poses)
+        if "overlay" in groups:
+            cases += overlay_cases(frame, poses)
+        if "display" in groups:
+            c, s = display_cases(base, display_size); cases += c; skipped += s
+        if "web" in groups:
+            cases += web_cases(base)
+
+        for group, name, fn in cases:
+            stats = time_call(fn, iterations, budget_s=budget_s)
+            results.append({"group": group, "name": name, "resolution": res, **stats})
+            print(f"{res:>6}  {group:<9} {name:<42} p50 {stats['p50_ms']:9.3f} ms   "
+                  f"p95 {stats['p95_ms']:9.3f} ms   ({stats['runs']} runs)")
+
+    # Skips repeat per resolution; report each once
+    skipped = [{"case": c, "reason": r} for c, r in dict.fromkeys(skipped)]
+    for s in skipped:
+        print(f"skipped {s['case']}: {s['reason']}")
+    return results, skipped
+
+
+def main(argv=None):
+    groups = ("detector", "math", "overlay", "display", "web")
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--res", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    ap.add_argument("--only", nargs="+", choices=groups, default=list(groups), help="stage groups to run")
+    ap.add_argument("--landmarks", help=".lmk recording to take landmarks from (default: synthetic)")
+    ap.add_argument("-n", "--iterations", type=int, default=200, help="max timed calls per case")
+    ap.add_argument("--budget", type=float, default=2.0, help="max seconds per case")
+    ap.add_argument("--display", default="1280x720", help="VideoWidget size, WxH")
+    ap.add_argument("-o", "--out", help="write results as JSON")
+    args = ap.parse_args(argv)
+
+    poses = load_landmarks(args.landmarks, limit=512) if args.landmarks else make_landmarks(512)
+    if not poses:
+        print(f"{args.landmarks}: no frames with a pose")
+        return 1
+    display_size = tuple(int(v) for v in args.display.lower().split("x"))
+
+    results, skipped = run(args.res, poses, args.iterations, args.budget, display_size, args.only)
+
+    if args.out:
+        write_json(args.out, {
+            "machine":   machine_info(),
+            "landmarks": args.landmarks or "synthetic",
+            "display":   args.display,
+            "results":   results,
+            "skipped":   skipped,
+        })
+        print(f"\n{len(results)} results → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: rep counting over an angle series
+Run: python benchmarks/bench_rep_counter.py [-n 100000]
+
+Compares RepCounter.run() (whole series in array ops) against feeding the same
+angles one by one through RepCounter.update(), on synthetic squat series.
+"""
+import argparse
+import timeit
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+
+import numpy as np
+
+from rep_counter import RepCounter
+
+UP_THRESH, DN_THRESH = 119.0, 99.0
+
+
+def squat_series(n, seed=0):
+    """Knee angles of squats at ~0.4 Hz, 30 fps, with sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    i   = np.arange(n)
+    return 125.0 + 35.0 * np.sin(i / 30.0 * 2 * np.pi * 0.4) + rng.normal(0, 1.0, n)
+
+
+def edge_series(n, seed):
+    """Random walk across both thresholds, rounded so angles often equal UP_THRESH,
+    with NaN holes (what calculate_angle_3d_batch returns for degenerate rows)."""
+    rng = np.random.default_rng(seed)
+    a   = np.round(np.cumsum(rng.normal(0, 6, n)) + 125.0)
+    a[rng.random(n) < 0.05] = np.nan
+    return a
+
+
+def update_path(angles):
+    rc = RepCounter(UP_THRESH, DN_THRESH)
+    events = [e for i, v in enumerate(angles.tolist()) for e in rc.update(v, i)]
+    return events, rc
+
+
+def run_path(angles):
+    rc = RepCounter(UP_THRESH, DN_THRESH)
+    events, _ = rc.run(angles)
+    return events, rc
+
+
+def state(rc):
+    return rc.stage, rc.counter, rc.shallow, rc.min_angle
+
+
+def check(seeds=300):
+    """Both paths must agree (events and end state) before their speed means anything."""
+    rng = np.random.default_rng(1)
+    for seed in range(seeds):
+        angles = edge_series(int(rng.integers(0, 400)), seed)
+        warm   = edge_series(int(rng.integers(0, 20)), seed + 10_000)
+
+        ref, got = RepCounter(UP_THRESH, DN_THRESH), RepCounter(UP_THRESH, DN_THRESH)
+        for v in warm.tolist():   # start both mid-stream, possibly inside a dip
+            ref.update(v)
+            got.update(v)
+
+        ref_events = [e for i, v in enumerate(angles.tolist()) for e in ref.update(v, i)]
+        got_events, _ = got.run(angles)
+        assert got_events == ref_events, (seed, got_events[:4], ref_events[:4])
+        assert state(got) == state(ref), (seed, state(got), state(ref))
+
+    for angles in ([150, 110, 80, np.nan, 90, 150], [150, UP_THRESH, 110, UP_THRESH, 90, 150]):
+        angles = np.asarray(angles, dtype=np.float64)
+        assert run_path(angles)[1].counter == update_path(angles)[1].counter == 1, angles
+
+
+def bench(fn, angles, repeat):
+    best = min(timeit.repeat(lambda: fn(angles), number=1, repeat=repeat))
+    return best / len(angles) * 1e9  # ns per sample
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("-n", type=int, default=100000, help="angles per run")
+    ap.add_argument("-r", "--repeat", type=int, default=5, help="runs; the best one is reported")
+    args = ap.parse_args(argv)
+
+    check()
+    angles = squat_series(args.n)
+
+    t_upd = bench(update_path, angles, args.repeat)
+    t_run = bench(run_path, angles, args.repeat)
+
+    print(f"update() loop   : {t_upd:8.1f} ns/sample")
+    print(f"run()           : {t_run:8.1f} ns/sample")
+    print(f"speed-up        : {t_upd / t_run:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Shared helpers for the benchmarks: repo imports, synthetic inputs, timing and JSON output.
+"""
+import json
+import os
+import platform
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import cv2
+import numpy as np
+
+from landmarks import NUM_LANDMARKS, PoseFrame
+
+RESOLUTIONS = {
+    "480p":  (854, 480),
+    "720p":  (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+
+def synthetic_frame(width, height, seed=0):
+    """Camera-like BGR frame: smooth gradients plus sensor noise (pure noise would skew JPEG timings)."""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    frame = np.empty((height, width, 3), np.float32)
+    frame[..., 0] = 60 + 50 * np.sin(xs / 97.0)
+    frame[..., 1] = 80 + 60 * np.cos(ys / 71.0)
+    frame[..., 2] = 90 + 40 * np.sin((xs + ys) / 131.0)
+    frame += rng.normal(0, 6, frame.shape).astype(np.float32)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def make_landmarks(n, width=1280, height=720, seed=0):
+    """Standing-figure-like PoseFrames, shaped like PoseDetector.get_landmarks() output."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        data = np.empty((NUM_LANDMARKS, 4), np.float32)
+        data[:, 0] = rng.uniform(0.4, 0.6, NUM_LANDMARKS)
+        data[:, 1] = np.linspace(0.1, 0.9, NUM_LANDMARKS) + rng.uniform(-0.05, 0.05, NUM_LANDMARKS)
+        data[:, 2] = rng.uniform(-0.2, 0.2, NUM_LANDMARKS)
+        data[:, 3] = rng.uniform(0.5, 1.0, NUM_LANDMARKS)
+        out.append(PoseFrame(data, width, height, "left"))
+    return out
+
+
+def load_landmarks(path, limit=None):
+    """PoseFrames from a .lmk recording (frames with a detected pose only)."""
+    from landmark_recording import LandmarkReplay
+    replay = LandmarkReplay(path)
+    rows   = np.asarray(replay.landmarks[replay.present][:limit])
+    return [PoseFrame(d.copy(), replay.width, replay.height, "left") for d in rows]
+
+
+def time_call(fn, iterations=100, warmup=3, budget_s=None):
+    """
+    Times fn() once per iteration. Stops early once budget_s seconds are spent
+    (after at least 5 samples). Returns a stats dict in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    clock   = time.perf_counter
+    start   = clock()
+    for _ in range(iterations):
+        t0 = clock()
+        fn()
+        samples.append(clock() - t0)
+        if budget_s and len(samples) >= 5 and clock() - start > budget_s:
+            break
+
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "runs":    len(samples),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms":  round(float(np.percentile(ms, 50)), 4),
+        "p95_ms":  round(float(np.percentile(ms, 95)), 4),
+        "min_ms":  round(float(ms.min()), 4),
+    }
+
+
+def machine_info():
+    return {
+        "python":   platform.python_version(),
+        "platform": platform.platform(),
+        "machine":  platform.machine(),
+        "cpus":     os.cpu_count(),
+        "numpy":    np.__version__,
+        "opencv":   cv2.__version__,
+        "time":     time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
@@ -2,6 +2,7 @@ import cv2
 import time
 import numpy as np
 from angle_calculator import calculate_angle_3d, get_best_leg
+from rep_counter import thresholds
 
 
 class Calibrator:
@@ -18,12 +19,11 @@ class Calibrator:
         up_angle   = self._calibrate_phase(cap, phase="UP")
         down_angle = self._calibrate_phase(cap, phase="DOWN")
 
-        up_threshold   = round(up_angle * 0.85, 1)
-        down_threshold = round(down_angle * 1.25, 1)
+        up_threshold, down_threshold = thresholds(up_angle, down_angle)
 
         print(f"\nCalibration complete!")
         print(f"Standing angle: {up_angle} deg  → UP threshold: {up_threshold}")
-        print(f"Squat angle:    {down_angle} deg → DOWN threshold: {down_threshold}")
+        print(f"Squat angle:    {down_angle} deg → rep depth threshold: {down_threshold}")
 
         return {
             "up_angle":   up_threshold,
@@ -31,16 +31,15 @@ class Calibrator:
         }
 
     def run_headless(self, cap, set_frame_callback):
-        """Calibration without GUI — frames are pushed to the browser via callback."""
+        """Calibration without GUI — each drawn BGR frame is passed to the callback (the stream encodes it)."""
         up_angle   = self._calibrate_phase_headless(cap, phase="UP",   set_frame=set_frame_callback)
         down_angle = self._calibrate_phase_headless(cap, phase="DOWN", set_frame=set_frame_callback)
 
-        up_threshold   = round(up_angle * 0.85, 1)
-        down_threshold = round(down_angle * 1.25, 1)
+        up_threshold, down_threshold = thresholds(up_angle, down_angle)
 
         print(f"\nHeadless calibration complete!")
         print(f"Standing angle: {up_angle} deg  → UP threshold: {up_threshold}")
-        print(f"Squat angle:    {down_angle} deg → DOWN threshold: {down_threshold}")
+        print(f"Squat angle:    {down_angle} deg → rep depth threshold: {down_threshold}")
 
         return {
             "up_angle":   up_threshold,
@@ -78,7 +77,7 @@ class Calibrator:
             landmarks = self.detector.get_landmarks(results, frame.shape, leg=leg)
 
             if landmarks:
-                angle = calculate_angle_3d(landmarks["hip_3d"], landmarks["knee_3d"], landmarks["ankle_3d"])
+                angle = calculate_angle_3d(landmarks.hip_3d, landmarks.knee_3d, landmarks.ankle_3d)
                 angles.append(angle)
             else:
                 angle = None
@@ -103,8 +102,7 @@ class Calibrator:
                 break
             remaining = int(deadline - time.time()) + 1
             self.renderer.draw_calibration_overlay(frame, phase, remaining)
-            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            set_frame(jpeg.tobytes())
+            set_frame(frame)
 
         # Collect angles for 2 seconds
         angles   = []
@@ -120,14 +118,13 @@ class Calibrator:
             landmarks = self.detector.get_landmarks(results, frame.shape, leg=leg)
 
             if landmarks:
-                angle = calculate_angle_3d(landmarks["hip_3d"], landmarks["knee_3d"], landmarks["ankle_3d"])
+                angle = calculate_angle_3d(landmarks.hip_3d, landmarks.knee_3d, landmarks.ankle_3d)
                 angles.append(angle)
             else:
                 angle = None
 
             self.renderer.draw_calibration_overlay(frame, phase, 0, angle)
-            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            set_frame(jpeg.tobytes())
+            set_frame(frame)
 
         if not angles:
             print(f"Warning: could not measure {phase} angle, using default.")
@@ -0,0 +1,178 @@
+"""
+Landmark recordings (.lmk) and a model-free replay source.
+
+File layout: a 64-byte header followed by fixed-size records, one per processed
+frame, so the whole file can be opened with np.memmap:
+
+    header  magic 'AFCLMK01', version, frame width, height, source fps
+    record  t (float64 seconds), present (uint8), lm (33 x 4 float32: x, y, z, visibility)
+"""
+import os
+
+import cv2
+import numpy as np
+
+from landmarks import NUM_LANDMARKS, PoseFrame, draw_skeleton
+
+REPLAY_EXT = ".lmk"
+MAGIC      = b"AFCLMK01"
+VERSION    = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic",   "S8"),
+    ("version", "<u4"),
+    ("width",   "<u4"),
+    ("height",  "<u4"),
+    ("fps",     "<f4"),
+    ("_pad",    "V40"),
+])
+RECORD_DTYPE = np.dtype([
+    ("t",       "<f8"),
+    ("present", "u1"),
+    ("_pad",    "V3"),
+    ("lm",      "<f4", (NUM_LANDMARKS, 4)),
+])
+
+
+class LandmarkRecorder:
+    """Appends one record per frame to a .lmk file."""
+
+    def __init__(self, path, width, height, fps):
+        header = np.zeros(1, HEADER_DTYPE)
+        header["magic"], header["version"] = MAGIC, VERSION
+        header["width"], header["height"], header["fps"] = width, height, fps
+
+        self._fh  = open(path, "wb")
+        self._fh.write(header.tobytes())
+        self._rec = np.zeros(1, RECORD_DTYPE)
+        self.count = 0
+
+    def write(self, t, landmarks=None):
+        """landmarks: MediaPipe landmark list, (33, 4) array, or None when no pose was found."""
+        rec = self._rec[0]
+        rec["t"] = t
+        if landmarks is None:
+            rec["present"] = 0
+        else:
+            rec["present"] = 1
+            if isinstance(landmarks, np.ndarray):
+                rec["lm"] = landmarks
+            else:
+                lm = rec["lm"]
+                for i, p in enumerate(landmarks):
+                    lm[i] = (p.x, p.y, p.z, p.visibility)
+        self._fh.write(self._rec.tobytes())
+        self.count += 1
+
+    def close(self):
+        self._fh.close()
+
+
+class LandmarkReplay:
+    """Memory-mapped view over a .lmk file."""
+
+    def __init__(self, path):
+        header = np.fromfile(path, HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path}: not a landmark recording")
+
+        self.width  = int(header["width"][0])
+        self.height = int(header["height"][0])
+        self.fps    = float(header["fps"][0]) or 30.0
+
+        n = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+        if n > 0:
+            self.records = np.memmap(path, RECORD_DTYPE, mode="r",
+                                     offset=HEADER_DTYPE.itemsize, shape=(n,))
+        else:
+            self.records = np.zeros(0, RECORD_DTYPE)
+
+        self.t         = self.records["t"]
+        self.present   = self.records["present"].astype(bool)
+        self.landmarks = self.records["lm"]   # (N, 33, 4), no copy
+
+    def __len__(self):
+        return len(self.records)
+
+
+class ReplayCapture:
+    """Stands in for cv2.VideoCapture: yields one blank frame of the recorded size per record."""
+
+    def __init__(self, replay):
+        self._replay = replay
+        self._blank  = np.zeros((replay.height, replay.width, 3), np.uint8)
+        self._i      = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self._i >= len(self._replay):
+            return False, None
+        self._i += 1
+        # Fresh copy: the renderer draws on every frame it gets
+        return True, self._blank.copy()
+
+    def set(self, prop, value):
+        """Only seeking (CAP_PROP_POS_FRAMES) is supported."""
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self._i = min(max(int(value), 0), len(self._replay))
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._i)
+        if prop == cv2.CAP_PROP_FPS:
+            return self._replay.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self._replay))
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._replay.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._replay.height)
+        return 0.0
+
+    def release(self):
+        pass
+
+
+class ReplayDetector:
+    """Stands in for PoseDetector: returns recorded landmarks instead of running the model."""
+
+    def __init__(self, replay):
+        self._replay = replay
+        self._pose   = PoseFrame()
+        self.frame_index = 0
+
+    def set_fps(self, fps):
+        pass
+
+    def skip_frame(self):
+        """Consumes the record of a frame that is shown but not analysed."""
+        self.frame_index += 1
+
+    def process_frame(self, frame):
+        """
+        Returns the record index for this frame. Frames are paired with records by
+        order, so every frame read from the ReplayCapture must be passed here once.
+        """
+        i = self.frame_index
+        self.frame_index += 1
+        return i
+
+    def get_landmarks(self, results, frame_shape, leg="left"):
+        i = results
+        if i >= len(self._replay) or not self._replay.present[i]:
+            return None
+        h, w = frame_shape[:2]
+        pose = self._pose
+        pose.data, pose.width, pose.height, pose.leg = self._replay.landmarks[i], w, h, leg
+        return pose
+
+    def draw_skeleton(self, frame, pose):
+        draw_skeleton(frame, pose)
+
+
+def is_recording(path):
+    return path.lower().endswith(REPLAY_EXT)
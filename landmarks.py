@@ -0,0 +1,234 @@
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+# MediaPipe pose indices per leg: shoulder, hip, knee, ankle
+LEG_INDICES = {
+    "left":  (11, 23, 25, 27),
+    "right": (12, 24, 26, 28),
+}
+LEFT_HIP, RIGHT_HIP = 23, 24
+
+SKELETON = [
+    (11, 12), (11, 13), (13, 15), (12, 14), (14, 16),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26),
+    (25, 27), (26, 28), (27, 29), (28, 30), (29, 31), (30, 32)
+]
+
+
+class PoseFrame:
+    """
+    One frame of pose landmarks as a (33, 4) float32 array: normalized x, y, z and visibility.
+
+    Named accessors refer to the selected leg (`leg`). 2D accessors return pixel
+    tuples for drawing, *_3d accessors return views into `data` (no copies).
+    """
+
+    __slots__ = ("data", "width", "height", "leg", "_px", "_scratch")
+
+    def __init__(self, data=None, width=1, height=1, leg="left"):
+        self.data     = np.zeros((NUM_LANDMARKS, 4), np.float32) if data is None else data
+        self.width    = width
+        self.height   = height
+        self.leg      = leg
+        self._px      = np.zeros((NUM_LANDMARKS, 2), np.int32)
+        self._scratch = np.zeros((NUM_LANDMARKS, 2), np.float32)
+
+    def fill(self, landmarks, width, height):
+        """Copies MediaPipe landmarks into the existing array."""
+        d = self.data
+        for i, lm in enumerate(landmarks):
+            d[i, 0] = lm.x
+            d[i, 1] = lm.y
+            d[i, 2] = lm.z
+            d[i, 3] = lm.visibility
+        self.width  = width
+        self.height = height
+        return self
+
+    def copy(self):
+        return PoseFrame(self.data.copy(), self.width, self.height, self.leg)
+
+    # Generic access
+
+    def px(self, index):
+        d = self.data[index]
+        return (int(d[0] * self.width), int(d[1] * self.height))
+
+    def xyz(self, index):
+        return self.data[index, :3]
+
+    def points_px(self):
+        """All 33 points in pixels, as a (33, 2) int32 array reused between calls."""
+        np.multiply(self.data[:, :2], (self.width, self.height), out=self._scratch)
+        np.copyto(self._px, self._scratch, casting="unsafe")
+        return self._px
+
+    @property
+    def visibility(self):
+        return self.data[:, 3]
+
+    def leg_points(self):
+        """
+        x, y, z of the selected leg's shoulder, hip, knee and ankle as 12 plain floats
+        (for scalar math), read one by one from `data` without a temporary array.
+        """
+        item = self.data.item
+        s, h, k, a = LEG_INDICES[self.leg]
+        return (item(s, 0), item(s, 1), item(s, 2), item(h, 0), item(h, 1), item(h, 2),
+                item(k, 0), item(k, 1), item(k, 2), item(a, 0), item(a, 1), item(a, 2))
+
+    # Selected leg, pixels
+
+    @property
+    def shoulder(self): return self.px(LEG_INDICES[self.leg][0])
+    @property
+    def hip(self):      return self.px(LEG_INDICES[self.leg][1])
+    @property
+    def knee(self):     return self.px(LEG_INDICES[self.leg][2])
+    @property
+    def ankle(self):    return self.px(LEG_INDICES[self.leg][3])
+
+    # Selected leg, normalized 3D
+
+    @property
+    def shoulder_3d(self): return self.xyz(LEG_INDICES[self.leg][0])
+    @property
+    def hip_3d(self):      return self.xyz(LEG_INDICES[self.leg][1])
+    @property
+    def knee_3d(self):     return self.xyz(LEG_INDICES[self.leg][2])
+    @property
+    def ankle_3d(self):    return self.xyz(LEG_INDICES[self.leg][3])
+
+    # Hip Z-depth for camera angle estimation
+
+    @property
+    def left_hip_z(self):  return float(self.data[LEFT_HIP, 2])
+    @property
+    def right_hip_z(self): return float(self.data[RIGHT_HIP, 2])
+
+
+class LandmarkPredictor:
+    """
+    Constant-velocity extrapolation of landmark arrays for frames the model skipped.
+
+    update() takes each model result (None when no pose was found); predict() is
+    called once per skipped frame and returns x, y, z moved on by the velocity
+    between the last two results, visibility unchanged. The returned array is
+    reused between calls. Prediction stops after max_steps frames, or until a
+    second result exists to take the velocity from.
+    """
+
+    __slots__ = ("max_steps", "_last", "_vel", "_pred", "_have", "_moving", "_steps")
+
+    def __init__(self, max_steps=4):
+        self.max_steps = max_steps
+        self._last     = np.zeros((NUM_LANDMARKS, 4), np.float32)
+        self._vel      = np.zeros((NUM_LANDMARKS, 3), np.float32)
+        self._pred     = np.zeros((NUM_LANDMARKS, 4), np.float32)
+        self._have     = False
+        self._moving   = False
+        self._steps    = 0
+
+    def update(self, data):
+        if data is None:
+            self._have = self._moving = False
+            return
+        if self._have:
+            # Velocity per frame over the gap since the previous result
+            np.subtract(data[:, :3], self._last[:, :3], out=self._vel)
+            self._vel /= self._steps + 1
+            self._moving = True
+        np.copyto(self._last, data)
+        self._have  = True
+        self._steps = 0
+
+    def predict(self):
+        self._steps += 1
+        if not self._have or self._steps > self.max_steps:
+            return None
+        if not self._moving:
+            return self._last
+        np.multiply(self._vel, self._steps, out=self._pred[:, :3])
+        self._pred[:, :3] += self._last[:, :3]
+        self._pred[:, 3] = self._last[:, 3]
+        return self._pred
+
+    def reset(self):
+        self._have = self._moving = False
+
+
+class OneEuroFilter:
+    """
+    One-Euro filter over the x, y, z of all 33 landmarks (visibility passes through).
+
+    Each coordinate is low-pass filtered with a cutoff that rises with its speed:
+    still joints are smoothed hard (min_cutoff, Hz), moving ones follow with little
+    lag (beta scales the speed, in normalized units per second). All state is
+    preallocated; __call__ returns `out`, which is reused between calls.
+    """
+
+    __slots__ = ("min_cutoff", "beta", "d_cutoff", "out", "_x", "_dx", "_d", "_a", "_have")
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta       = beta
+        self.d_cutoff   = d_cutoff
+        self.out        = np.zeros((NUM_LANDMARKS, 4), np.float32)
+        self._x         = np.zeros((NUM_LANDMARKS, 3), np.float32)  # filtered position
+        self._dx        = np.zeros((NUM_LANDMARKS, 3), np.float32)  # filtered speed
+        self._d         = np.zeros((NUM_LANDMARKS, 3), np.float32)  # scratch
+        self._a         = np.zeros((NUM_LANDMARKS, 3), np.float32)  # scratch: cutoff, then alpha
+        self._have      = False
+
+    def __call__(self, data, dt):
+        """Filters one (33, 4) landmark array taken dt seconds after the previous one."""
+        x = data[:, :3]
+        if not self._have:
+            np.copyto(self._x, x, casting="unsafe")
+            self._dx.fill(0.0)
+            self._have = True
+        else:
+            dt   = max(dt, 1e-3)
+            rate = 1.0 / (2.0 * np.pi * dt)   # alpha(cutoff) = cutoff / (cutoff + rate)
+            d, a = self._d, self._a
+
+            # Smoothed speed
+            np.subtract(x, self._x, out=d, casting="unsafe")
+            d /= dt
+            d -= self._dx
+            d *= self.d_cutoff / (self.d_cutoff + rate)
+            self._dx += d
+
+            # Speed-dependent cutoff, then the position update
+            np.abs(self._dx, out=a)
+            a *= self.beta
+            a += self.min_cutoff
+            np.add(a, rate, out=d)
+            a /= d
+            np.subtract(x, self._x, out=d, casting="unsafe")
+            d *= a
+            self._x += d
+
+        self.out[:, :3] = self._x
+        self.out[:, 3]  = data[:, 3]
+        return self.out
+
+    def reset(self):
+        """Forgets the history, e.g. after frames without a pose."""
+        self._have = False
+
+
+def draw_skeleton(frame, pose):
+    """Draws all landmarks and connections of a PoseFrame."""
+    if pose is None:
+        return
+
+    pts = pose.points_px().tolist()
+
+    for start, end in SKELETON:
+        cv2.line(frame, pts[start], pts[end], (0, 255, 0), 2)
+
+    for pt in pts:
+        cv2.circle(frame, pt, 4, (255, 255, 255), -1)
@@ -3,17 +3,19 @@ AI Fitness Coach — PyQt6 application
 Run: python main.py
 Requires: pip install PyQt6
 """
-import sys, os, time, cv2, numpy as np
+import sys, os, time, queue, threading, cv2, numpy as np
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QStackedWidget,
     QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
     QFrame, QFileDialog, QSizePolicy, QGraphicsDropShadowEffect,
     QSpacerItem
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QPoint, QRect, QSize
-from PyQt6.QtGui import QImage, QPixmap, QFont, QPainter, QColor, QPen, QPalette, QLinearGradient, QBrush
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QPoint, QRect, QSize
+from PyQt6.QtGui import QImage, QFont, QPainter, QColor, QPen, QPalette, QLinearGradient, QBrush
 
 sys.path.insert(0, os.path.dirname(__file__))
+from pipeline import AdaptiveSkipper, FrameQueue, Stage, run_stages
+from profiler import StageTimings, format_stats
 
 def resource_path(rel):
     """Resolves resource path for both .py and PyInstaller .exe."""
@@ -211,49 +213,214 @@ class HudPanel(QFrame):
                 p.drawLine(QPoint(mx,my), QPoint(x2,y2))
         p.end()
 
-# Video frame widget
-class VideoWidget(QLabel):
+# Video frame display
+class FrameScaler:
+    """
+    Fits BGR frames to a widget and converts them for painting, on the caller's
+    thread (the worker), into a few rotating reused buffers.
+
+    Output is BGRA with opaque alpha, i.e. the byte layout of QImage.Format_RGB32
+    on little-endian machines, so QPainter.drawImage is a plain blit. Returns a
+    QImage over the buffer (no copy). Buffers of the images passed as `keep`
+    are never reused, so with SLOTS = 3 a pending and a painted frame stay intact.
+    """
+
+    SLOTS = 3
+
+    def __init__(self):
+        self.size  = (0, 0)   # target size, set from the GUI thread; (0, 0) = source size
+        self._bufs = [None] * self.SLOTS
+        self._imgs = [None] * self.SLOTS
+        self._tmp  = None
+        self._i    = 0
+
+    def set_size(self, w, h):
+        self.size = (w, h)
+
+    def convert(self, bgr, keep=()):
+        h, w   = bgr.shape[:2]
+        vw, vh = self.size
+        if vw > 0 and vh > 0:
+            scale  = min(vw/w, vh/h)
+            nw, nh = max(1, int(w*scale)), max(1, int(h*scale))
+        else:
+            nw, nh = w, h
+
+        i = self._i
+        for _ in range(self.SLOTS):
+            i = (i + 1) % self.SLOTS
+            if not any(self._imgs[i] is k for k in keep):
+                break
+        self._i = i
+        buf = self._bufs[i]
+        if buf is None or buf.shape[:2] != (nh, nw):
+            buf = self._bufs[i] = np.empty((nh, nw, 4), np.uint8)
+            self._imgs[i] = QImage(buf.data, nw, nh, nw*4, QImage.Format.Format_RGB32)
+
+        if (nw, nh) != (w, h):
+            if self._tmp is None or self._tmp.shape[:2] != (nh, nw):
+                self._tmp = np.empty((nh, nw, 3), np.uint8)
+            bgr = cv2.resize(bgr, (nw, nh), dst=self._tmp, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA, dst=buf)
+        return self._imgs[i]
+
+
+class VideoWidget(QWidget):
+    """Paints the latest frame centered on black; no per-frame QPixmap."""
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setStyleSheet("background: #000; border: none;")
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.setMinimumSize(320, 180)
+        self.scaler = FrameScaler()
+        self._img   = None
+
+    def resizeEvent(self, e):
+        super().resizeEvent(e)
+        self.scaler.set_size(self.width(), self.height())
+
+    def show_frame(self, frame):
+        """frame: a QImage from self.scaler (converted on the worker), or a BGR array (converted here)."""
+        if frame is None: return
+        if not isinstance(frame, QImage):
+            frame = self.scaler.convert(frame)
+        self._img = frame
+        self.update()
+
+    def paintEvent(self, e):
+        p    = QPainter(self)
+        img  = self._img
+        w, h = self.width(), self.height()
+        if img is None:
+            p.fillRect(0, 0, w, h, QColor(0, 0, 0))
+            p.end(); return
+
+        iw, ih = img.width(), img.height()
+        fits   = iw <= w and ih <= h and (iw == w or ih == h)
+        if not fits:
+            # Frame converted for another size (e.g. mid-resize): let Qt scale it once
+            scale  = min(w/iw, h/ih)
+            iw, ih = int(iw*scale), int(ih*scale)
+        x, y = (w-iw)//2, (h-ih)//2
+
+        # Black bars only; the frame covers the rest
+        black = QColor(0, 0, 0)
+        p.fillRect(0, 0, w, y, black)
+        p.fillRect(0, y+ih, w, h-y-ih, black)
+        p.fillRect(0, y, x, ih, black)
+        p.fillRect(x+iw, y, w-x-iw, ih, black)
+        if fits:
+            p.drawImage(x, y, img)
+        else:
+            p.drawImage(QRect(x, y, iw, ih), img)
+        p.end()
+
+class FrameMailbox(QObject):
+    """
+    Latest-frame-wins handoff from the worker thread to GUI slots.
+
+    At most one frame is pending: posting while one is still waiting replaces it
+    and counts it in `dropped`, so frames never pile up in the event loop when
+    painting falls behind. With a FrameScaler attached, frames are fitted on the
+    posting thread without touching the pending or last delivered buffer.
+    """
+    _wake = pyqtSignal()
+
+    def __init__(self, scaler=None):
+        super().__init__()
+        self.scaler   = scaler
+        self.dropped  = 0
+        self._lock    = threading.Lock()
+        self._pending = None
+        self._shown   = None
+        self._slots   = []
+        self._wake.connect(self._deliver, Qt.ConnectionType.QueuedConnection)
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def post(self, frame):
+        if self.scaler:
+            with self._lock:
+                keep = (self._pending, self._shown)
+            frame = self.scaler.convert(frame, keep)
+        with self._lock:
+            wake = self._pending is None
+            if not wake:
+                self.dropped += 1
+            self._pending = frame
+        if wake:
+            self._wake.emit()
+
+    def _deliver(self):
+        with self._lock:
+            frame, self._pending = self._pending, None
+            if frame is None:
+                return
+            self._shown = frame
+        for slot in self._slots:
+            slot(frame)
+
+
+class HudModel:
+    """
+    Worker-side HUD state. update() takes the full state of a frame and returns
+    only the fields that differ from what was last sent, at most `rate` times a
+    second (None otherwise); flush() sends whatever is still outstanding.
+    """
+
+    def __init__(self, rate=60.0):
+        self._interval = 1.0 / max(rate, 1.0)
+        self._sent     = {}
+        self._latest   = {}
+        self._next     = 0.0
+
+    def update(self, **state):
+        self._latest = state
+        now = time.monotonic()
+        if now < self._next:
+            return None
+        return self.flush(now)
+
+    def flush(self, now=None):
+        sent    = self._sent
+        changed = {k: v for k, v in self._latest.items() if k not in sent or sent[k] != v}
+        if not changed:
+            return None
+        sent.update(changed)
+        self._next = (now or time.monotonic()) + self._interval
+        return changed
 
-    def show_frame(self, bgr):
-        if bgr is None: return
-        h, w = bgr.shape[:2]
-        vw = max(self.width(),  1)
-        vh = max(self.height(), 1)
-        scale = min(vw/w, vh/h)
-        nw, nh = int(w*scale), int(h*scale)
-        frame = cv2.resize(bgr, (nw, nh), interpolation=cv2.INTER_LINEAR)
-        rgb   = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img   = QImage(rgb.data, nw, nh, nw*3, QImage.Format.Format_RGB888)
-        self.setPixmap(QPixmap.fromImage(img))
 
 # Worker thread
 class Worker(QThread):
-    preview_frame  = pyqtSignal(object)
-    calib_frame    = pyqtSignal(object)
     calib_done     = pyqtSignal(float, float)
-    analysis_frame = pyqtSignal(object)
-    hud            = pyqtSignal(int, str, str, str, int, int, bool, list, int)
-    # hud: counter, stage, feedback, color_hex, fps, back_angle, back_ok, warnings, depth_pct
+    hud            = pyqtSignal(dict)
+    # hud: changed fields only (see HudModel) — counter, stage, feedback, color,
+    #      fps, back_angle, back_ok, depth, dropped
     ended          = pyqtSignal(int)
 
     def __init__(self):
         super().__init__()
         self._source   = None
         self._path     = ''
+        self._live     = False
         self._mode     = None
         self._alive    = True
         self._up       = 140.0
         self._dn       = 90.0
-
-    def setup(self, source, path=''):
+        self.timings   = StageTimings()  # per-stage frame times, read by the profiler panel
+        self.hud_rate  = 60.0            # max HUD updates per second (display refresh rate)
+        # Frames for the GUI; connect() a slot, set .scaler to fit frames on this thread
+        self.preview_frames  = FrameMailbox()
+        self.calib_frames    = FrameMailbox()
+        self.analysis_frames = FrameMailbox()
+
+    def setup(self, source, path='', live_stream=False):
         self._source = source
         self._path   = path
+        self._live   = live_stream
 
     def go_preview(self):   self._mode = 'preview'
     def go_calibrate(self): self._mode = 'calibrate'
@@ -267,18 +434,45 @@ class Worker(QThread):
         self.wait(2000)
 
     def run(self):
-        from pose_detector import PoseDetector
-        from angle_calculator import (calculate_angle_3d, calculate_back_angle,
-            calculate_knee_deviation_3d, estimate_camera_angle, get_best_leg)
+        self._detector = None
+        self._stages   = None   # stops and joins the analysis threads once started
+        try:
+            self._run()
+        finally:
+            # The loaded model goes back to the pool for the next session, but only
+            # if no stage thread that timed out on join can still be inside it
+            ended = self._stages() if self._stages else True
+            if self._detector is not None:
+                from pose_detector import detector_pool
+                if ended:
+                    detector_pool.release(self._detector)
+                else:
+                    self._detector.close()
+
+    def _run(self):
+        from pose_detector import detector_pool
+        from landmark_recording import LandmarkReplay, ReplayCapture, ReplayDetector, is_recording
+        from angle_calculator import squat_metrics, get_best_leg
+        from landmarks import LandmarkPredictor, OneEuroFilter, PoseFrame
+        from rep_counter import DOWN, REP, SHALLOW_REP, RepCounter
         from ui_renderer import UIRenderer
 
         renderer = UIRenderer()
-        detector = PoseDetector(0.7, 0.7)
-        cap = (cv2.VideoCapture(0) if self._source == 'webcam'
-               else cv2.VideoCapture(self._path))
+        timings  = self.timings
+        if self._source == 'video' and is_recording(self._path):
+            # Recorded landmarks: no model in the loop
+            replay   = LandmarkReplay(self._path)
+            detector = ReplayDetector(replay)
+            cap      = ReplayCapture(replay)
+        else:
+            # Live-stream mode: inference never blocks the capture loop
+            detector = self._detector = detector_pool.acquire(0.7, 0.7, live_stream=self._live)
+            cap = (cv2.VideoCapture(0) if self._source == 'webcam'
+                   else cv2.VideoCapture(self._path))
 
         if not cap.isOpened():
             self._alive = False; return
+        detector.timings = timings
 
         # Pass source FPS to detector for accurate timestamps
         src_fps = cap.get(cv2.CAP_PROP_FPS)
@@ -287,13 +481,16 @@ class Worker(QThread):
         # Grab first frame for video preview
         if self._source == 'video':
             ok, first = cap.read()
-            if ok: self.preview_frame.emit(first)
+            if ok: self.preview_frames.post(first)
+            # A replay pairs frames with records by order: rewind, so the frame
+            # shown as preview is not one record ahead of the detector
+            if isinstance(cap, ReplayCapture): cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
         # Preview loop
         while self._alive and self._mode == 'preview':
             if self._source == 'webcam':
                 ok, f = cap.read()
-                if ok: self.preview_frame.emit(f)
+                if ok: self.preview_frames.post(f)
             self.msleep(30)
 
         # Calibration
@@ -318,12 +515,7 @@ class Worker(QThread):
         #
         # Works at any camera angle — thresholds adapt to the user's
         # actual standing angle, not fixed values like 140°/90°.
-
-        counter           = 0
-        stage             = None      # None | 'UP' | 'DOWN'
-        min_angle_reached = 360.0
-        angle_buf         = []
-        BUF_SIZE          = 5
+        # The state machine itself lives in rep_counter.RepCounter.
 
         # Thresholds from calibration; use defaults if not calibrated
         # self._up = standing angle  (calibrated ~160°, default 140°)
@@ -331,31 +523,98 @@ class Worker(QThread):
         standing = self._up
         squatting = self._dn
 
-        # UP_THRESH: angle above which = "standing"  (85% of standing angle)
-        # DN_THRESH: minimum angle required to count a rep (midpoint of range)
-        UP_THRESH = round(standing * 0.85, 1)
-        DN_THRESH = round((standing + squatting) / 2.0, 1)
-
-        # Ensure minimum gap between thresholds
-        if UP_THRESH - DN_THRESH < 20:
-            DN_THRESH = UP_THRESH - 20
+        reps      = RepCounter.from_calibration(standing, squatting)
+        UP_THRESH = reps.up_thresh
+        DN_THRESH = reps.dn_thresh
+        frame_no  = 0
 
         print(f"[Analyze] standing={standing} squatting={squatting} UP_THRESH={UP_THRESH} DN_THRESH={DN_THRESH}")
 
         fps_t = time.time(); fps_n = 0; fps = 0
+        hud   = HudModel(self.hud_rate)
         BACK_LIM, KNEE_LIM = 35, 0.15
         current_leg = 'left'
 
+        # Capture and inference run on their own threads; this thread is the
+        # render stage. Webcam queues drop stale frames, video queues block so
+        # no frame of a recording is skipped.
+        drop     = self._source == 'webcam'
+        q_cap    = FrameQueue(2, drop)
+        q_inf    = FrameQueue(2, drop)
+        stop_evt = threading.Event()
+
+        def grab():
+            t = time.perf_counter()
+            ok, f = cap.read()
+            timings.since('capture', t)
+            return f if ok else None
+
+        # Video files go through the blocking model: when it cannot keep up with the
+        # source fps it runs on every k-th frame only, and the render stage predicts
+        # the frames in between (None result). Live stream drops frames inside
+        # MediaPipe instead; replays cost nothing to "detect".
+        skipper   = (AdaptiveSkipper(src_fps if src_fps > 0 else 30.0)
+                     if self._source == 'video' and not isinstance(detector, ReplayDetector) else None)
+        predictor = LandmarkPredictor(skipper.max_k if skipper else 0)
+        pred_pose = PoseFrame()
+
+        # Landmarks are smoothed before any metric is taken from them. Video files
+        # advance by one source frame per item, webcam frames by wall-clock time.
+        smoother    = OneEuroFilter()
+        smooth_pose = PoseFrame(smoother.out)
+        frame_dt    = 1.0 / src_fps if self._source == 'video' and src_fps > 0 else None
+        last_t      = time.perf_counter()
+
+        def infer(f):
+            if skipper is None:
+                return f, detector.process_frame(f)
+            if not skipper.should_infer():
+                detector.skip_frame()
+                return f, None
+            t = time.perf_counter()
+            res = detector.process_frame(f)
+            skipper.record(time.perf_counter() - t)
+            return f, res
+
+        shutdown = self._stages = run_stages([
+            Stage('capture',   grab,  None,  q_cap, stop_evt),
+            Stage('inference', infer, q_cap, q_inf, stop_evt),
+        ], stop_evt)
+
         while self._alive and self._mode == 'analyze':
-            ok, frame = cap.read()
-            if not ok:
-                self.ended.emit(counter)
+            try:
+                item = q_inf.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                changes = hud.flush()
+                if changes: self.hud.emit(changes)
+                self.ended.emit(reps.counter)
                 break
 
-            results     = detector.process_frame(frame)
-            detector.draw_skeleton(frame, results)
-            current_leg = get_best_leg(results, current_leg)
-            lm          = detector.get_landmarks(results, frame.shape, leg=current_leg)
+            frame, results = item
+            frame_no += 1
+            t  = time.perf_counter()
+            if results is None:
+                lm   = None
+                data = predictor.predict()
+                if data is not None:
+                    pred_pose.data, pred_pose.leg = data, current_leg
+                    pred_pose.height, pred_pose.width = frame.shape[:2]
+                    lm = pred_pose
+            else:
+                lm = detector.get_landmarks(results, frame.shape, leg=current_leg)
+                if lm:
+                    current_leg = lm.leg = get_best_leg(lm, current_leg)
+                predictor.update(lm.data if lm else None)
+            if lm:
+                smoother(lm.data, frame_dt or t - last_t)
+                smooth_pose.width, smooth_pose.height, smooth_pose.leg = lm.width, lm.height, lm.leg
+                lm = smooth_pose
+            else:
+                smoother.reset()
+            last_t = t
+            t = timings.since('landmarks', t)
 
             feedback = "Stand in front of camera"
             fb_color = C['amber']
@@ -365,77 +624,58 @@ class Worker(QThread):
             back_ok  = True
 
             if lm:
-                raw = calculate_angle_3d(lm['hip_3d'], lm['knee_3d'], lm['ankle_3d'])
-                back_ang = calculate_back_angle(lm['shoulder'], lm['hip'])
-                knee_dev = calculate_knee_deviation_3d(lm['knee_3d'], lm['ankle_3d'], lm['hip_3d'])
+                angle, back_ang, knee_dev = squat_metrics(lm)
                 back_ok  = back_ang <= BACK_LIM
 
-                angle_buf.append(raw)
-                if len(angle_buf) > BUF_SIZE:
-                    angle_buf.pop(0)
-                angle = sum(angle_buf) / len(angle_buf)
-
-                # Track minimum angle while not in UP
-                if stage != 'UP':
-                    min_angle_reached = min(min_angle_reached, angle)
-
-                if stage == 'DOWN':
+                if reps.stage == DOWN:
                     if not back_ok:
                         warnings.append('Round back')
                     if knee_dev < -KNEE_LIM:
                         warnings.append('Knees caving in')
 
-                # State machine
-                if angle > UP_THRESH:
-                    if stage == 'DOWN':
-                        if min_angle_reached <= DN_THRESH:
-                            counter += 1
-                            feedback = f"Rep #{counter}!"
-                            fb_color = C['neon']
-                            print(f"[REP] #{counter}  min={min_angle_reached:.1f}  DN={DN_THRESH}")
-                        else:
-                            feedback = f"Go deeper next time ({int(min_angle_reached)}° > {int(DN_THRESH)}°)"
-                            fb_color = C['red']
-                        min_angle_reached = 360.0
-                    else:
-                        feedback = "Ready — squat down!"
-                        fb_color = C['neon']
-                    stage = 'UP'
-
+                events = reps.update(angle, frame_no)
+                fb_color = C['neon']
+                if events and events[0].kind == REP:
+                    feedback = f"Rep #{reps.counter}!"
+                    print(f"[REP] #{reps.counter}  min={events[0].min_angle:.1f}  DN={DN_THRESH}")
+                elif events and events[0].kind == SHALLOW_REP:
+                    feedback = f"Go deeper next time ({int(events[0].min_angle)}° > {int(DN_THRESH)}°)"
+                    fb_color = C['red']
                 elif angle < DN_THRESH:
-                    stage    = 'DOWN'
                     feedback = "Good — stand up!"
-                    fb_color = C['neon']
-
+                elif reps.stage == DOWN and reps.min_angle <= DN_THRESH:
+                    feedback = f"Stand up!  {int(angle)}° → {int(UP_THRESH)}°"
+                elif reps.stage == DOWN:
+                    feedback = f"Squat down!  {int(angle)}° → {int(DN_THRESH)}°"
                 else:
-                    if stage == 'DOWN':
-                        feedback = f"Stand up!  {int(angle)}° → {int(UP_THRESH)}°"
-                        fb_color = C['neon']
-                    elif stage == 'UP':
-                        feedback = f"Squat down!  {int(angle)}° → {int(DN_THRESH)}°"
-                        fb_color = C['neon']
-                    else:
-                        feedback = "Ready — squat down!"
-                        fb_color = C['neon']
+                    feedback = "Ready — squat down!"
 
-                col_bgr = tuple(int(fb_color.lstrip('#')[i:i+2], 16) for i in (4, 2, 0))
-                renderer.draw_joint_lines(frame, lm['hip'], lm['knee'], lm['ankle'], col_bgr)
-                renderer.draw_angle(frame, lm['knee'], angle, col_bgr)
-            else:
-                angle_buf = []
-
-            renderer.draw_form_warnings(frame, warnings)
             pct = int(max(0, min(100, (UP_THRESH - max(DN_THRESH, min(UP_THRESH, angle))) /
                                        max(1, UP_THRESH - DN_THRESH) * 100)))
+            t = timings.since('math', t)
+
+            if lm:
+                col_bgr = tuple(int(fb_color.lstrip('#')[i:i+2], 16) for i in (4, 2, 0))
+                knee = lm.knee
+                detector.draw_skeleton(frame, lm)
+                renderer.draw_joint_lines(frame, lm.hip, knee, lm.ankle, col_bgr)
+                renderer.draw_angle(frame, knee, angle, col_bgr)
+            renderer.draw_form_warnings(frame, warnings)
+            t = timings.since('overlay', t)
+
             fps_n += 1
             if time.time() - fps_t >= 1.0:
                 fps = fps_n; fps_n = 0; fps_t = time.time()
 
-            self.analysis_frame.emit(frame)
-            self.hud.emit(counter, stage or '', feedback, fb_color, fps,
-                          int(back_ang), bool(back_ok), warnings, pct)
-            self.msleep(1)
+            self.analysis_frames.post(frame)
+            changes = hud.update(counter=reps.counter, stage=reps.stage or '', feedback=feedback, color=fb_color,
+                                 fps=fps, back_angle=int(back_ang), back_ok=bool(back_ok), depth=pct,
+                                 dropped=self.analysis_frames.dropped)
+            if changes:
+                self.hud.emit(changes)
+            timings.since('handoff', t)
 
+        shutdown()
         cap.release()
 
     def _cal_phase(self, cap, detector, renderer, phase):
@@ -445,8 +685,9 @@ class Worker(QThread):
         while time.time() < deadline:
             ok, f = cap.read()
             if not ok: break
+            detector.skip_frame()   # keeps video timestamps and replay records in step
             renderer.draw_calibration_overlay(f, phase, int(deadline-time.time())+1)
-            self.calib_frame.emit(f)
+            self.calib_frames.post(f)
             self.msleep(30)
         angles = []; deadline = time.time() + 2
         while time.time() < deadline:
@@ -457,10 +698,10 @@ class Worker(QThread):
             lm  = detector.get_landmarks(res, f.shape, leg=leg)
             a   = None
             if lm:
-                a = calculate_angle_3d(lm['hip_3d'], lm['knee_3d'], lm['ankle_3d'])
+                a = calculate_angle_3d(lm.hip_3d, lm.knee_3d, lm.ankle_3d)
                 angles.append(a)
             renderer.draw_calibration_overlay(f, phase, 0, a)
-            self.calib_frame.emit(f)
+            self.calib_frames.post(f)
             self.msleep(30)
         return float(np.median(angles)) if angles else (160.0 if phase=='UP' else 70.0)
 
@@ -520,7 +761,7 @@ class MenuScreen(QWidget):
 
     def _pick(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select video", "",
-            "Video (*.mp4 *.avi *.mov *.mkv *.wmv *.flv);;All (*.*)")
+            "Video (*.mp4 *.avi *.mov *.mkv *.wmv *.flv);;Landmark recording (*.lmk);;All (*.*)")
         if path: self.sig_video.emit(path)
 
     def _on_tick(self):
@@ -731,8 +972,20 @@ class AnalysisScreen(QWidget):
         self.depth_bar.setGeometry(0, 0, 20, 160)
         self.depth_fill = QFrame(self.depth_bar)
         self.depth_fill.setStyleSheet(f"background:{C['neon']}; border-radius:3px;")
+        self._depth_col = None
+        self._hud       = {}  # last applied HUD fields
         self.depth_bar.setStyleSheet(f"background:{C['panel']}; border:1px solid {C['border']}; border-radius:4px;")
 
+        # Stage timings panel (toggled with P), refreshed at 2 Hz while visible
+        self._timings   = None
+        self.prof_panel = QLabel(self.video)
+        self.prof_panel.setStyleSheet(f"color:{C['white']}; background:rgba(13,26,36,220); border:1px solid {C['border']}; border-radius:4px; font-family:Consolas,monospace; font-size:10px; padding:6px;")
+        self.prof_panel.move(10, 10)
+        self.prof_panel.hide()
+        self._prof_timer = QTimer(self)
+        self._prof_timer.setInterval(500)
+        self._prof_timer.timeout.connect(self._refresh_profiler)
+
         # Bottom feedback bar
         self.fb_bar = QFrame()
         self.fb_bar.setFixedHeight(52)
@@ -767,7 +1020,28 @@ class AnalysisScreen(QWidget):
     def push(self, frame):
         self.video.show_frame(frame)
 
+    def set_timings(self, timings):
+        self._timings = timings
+        if self.prof_panel.isVisible():
+            self._refresh_profiler()
+
+    def toggle_profiler(self):
+        if self.prof_panel.isVisible():
+            self._prof_timer.stop()
+            self.prof_panel.hide()
+        else:
+            self._refresh_profiler()
+            self.prof_panel.show()
+            self.prof_panel.raise_()
+            self._prof_timer.start()
+
+    def _refresh_profiler(self):
+        stats = self._timings.percentiles() if self._timings else {}
+        self.prof_panel.setText(format_stats(stats) if stats else "NO TIMINGS YET")
+        self.prof_panel.adjustSize()
+
     def reset(self):
+        self._hud = {}
         self.lbl_counter.setText("0")
         self.lbl_stage.setText("---")
         self.lbl_stage.setStyleSheet(f"color:{C['muted']}; font-family:Consolas,monospace; font-size:18px; font-weight:700; background:transparent;")
@@ -777,29 +1051,49 @@ class AnalysisScreen(QWidget):
         if hasattr(self, "_fin_overlay"):
             self._fin_overlay.hide()
 
-    def update_hud(self, counter, stage, feedback, color, fps, back_ang, back_ok, warnings):
-        self.lbl_counter.setText(str(counter))
-        self.lbl_fps.setText(f"{fps} FPS")
-
-        sc = C['neon'] if stage=='UP' else (C['neon2'] if stage=='DOWN' else C['muted'])
-        self.lbl_stage.setText(stage or '---')
-        self.lbl_stage.setStyleSheet(f"color:{sc}; font-family:Consolas,monospace; font-size:18px; font-weight:700; background:transparent;")
-
-        self.fb_text.setText(feedback)
-        self.fb_text.setStyleSheet(f"color:{color}; font-size:14px; font-weight:600; background:transparent;")
-        self.fb_dot.setStyleSheet(f"color:{color}; font-size:10px; background:transparent;")
-        self._set_fb_style(color)
-
-        back_color = C['neon'] if back_ok else C['red']
-        self.lbl_back.setText(f"BACK  {back_ang}°  {'✓' if back_ok else '!'}")
-        self.lbl_back.setStyleSheet(f"color:{back_color}; font-size:11px; font-family:Consolas; background:transparent;")
+    def update_hud(self, changes):
+        """Applies the fields HudModel reported as changed; other widgets are left untouched."""
+        hud = self._hud
+        hud.update(changes)
+
+        if "counter" in changes:
+            self.lbl_counter.setText(str(hud["counter"]))
+        if "fps" in changes or "dropped" in changes:
+            fps, dropped = hud.get("fps", 0), hud.get("dropped", 0)
+            self.lbl_fps.setText(f"{fps} FPS  ·  {dropped} DROP" if dropped else f"{fps} FPS")
+
+        if "stage" in changes:
+            stage = hud["stage"]
+            sc = C['neon'] if stage=='UP' else (C['neon2'] if stage=='DOWN' else C['muted'])
+            self.lbl_stage.setText(stage or '---')
+            self.lbl_stage.setStyleSheet(f"color:{sc}; font-family:Consolas,monospace; font-size:18px; font-weight:700; background:transparent;")
+
+        if "feedback" in changes:
+            self.fb_text.setText(hud["feedback"])
+        if "color" in changes:
+            color = hud["color"]
+            self.fb_text.setStyleSheet(f"color:{color}; font-size:14px; font-weight:600; background:transparent;")
+            self.fb_dot.setStyleSheet(f"color:{color}; font-size:10px; background:transparent;")
+            self._set_fb_style(color)
+
+        if "back_angle" in changes or "back_ok" in changes:
+            back_ok = hud.get("back_ok", True)
+            self.lbl_back.setText(f"BACK  {hud.get('back_angle', 0)}°  {'✓' if back_ok else '!'}")
+        if "back_ok" in changes:
+            back_color = C['neon'] if hud["back_ok"] else C['red']
+            self.lbl_back.setStyleSheet(f"color:{back_color}; font-size:11px; font-family:Consolas; background:transparent;")
+
+        if "depth" in changes:
+            self.set_depth(hud["depth"])
 
     def set_depth(self, pct):
         bh  = self.depth_bar.height()
         fh  = int(bh * pct / 100)
         col = C["neon"] if pct>=95 else (C["amber"] if pct>50 else C["red"])
         self.depth_fill.setGeometry(1, bh-fh, 12, fh)
-        self.depth_fill.setStyleSheet(f"background:{col}; border-radius:2px;")
+        if col != self._depth_col:
+            self._depth_col = col
+            self.depth_fill.setStyleSheet(f"background:{col}; border-radius:2px;")
 
     def show_finished(self, count):
         """Shows overlay on top of the last frame — window stays open."""
@@ -852,6 +1146,8 @@ class AnalysisScreen(QWidget):
         vh = self.video.height()
         bh = min(180, vh - 20)
         self.depth_bar.setGeometry(self.video.width() - 22, (vh - bh)//2, 14, bh)
+        if "depth" in self._hud:
+            self.set_depth(self._hud["depth"])  # fill height follows the bar
         if hasattr(self, "_fin_overlay") and self._fin_overlay.isVisible():
             self._fin_overlay.setGeometry(self.rect())
 
@@ -920,7 +1216,7 @@ class CalibOverlay(QWidget):
         fv.addWidget(self.video)
         layout.addWidget(self._frame_panel)
 
-    def show_frame(self, bgr): self.video.show_frame(bgr)
+    def show_frame(self, frame): self.video.show_frame(frame)
     def set_phase(self, phase):
         self.lbl_inst.setText("STAND STRAIGHT" if phase == "UP" else "SQUAT DOWN")
         self.lbl_step.setText("STEP 1 OF 2" if phase == "UP" else "STEP 2 OF 2")
@@ -1013,11 +1309,16 @@ class MainWindow(QMainWindow):
         # Start worker thread
         self._stop_worker()
         self._worker = Worker()
-        self._worker.setup(source, path)
-        self._worker.preview_frame.connect(self._preview.push)
-        self._worker.calib_frame.connect(self._on_calib_frame)
+        self._worker.setup(source, path, live_stream=(source == 'webcam'))
+        self._worker.hud_rate = self.screen().refreshRate() or 60.0
+        self._worker.preview_frames.scaler  = self._preview.video.scaler
+        self._worker.calib_frames.scaler    = self._calib_overlay.video.scaler
+        self._worker.analysis_frames.scaler = self._analysis.video.scaler
+        self._worker.preview_frames.connect(self._preview.push)
+        self._worker.calib_frames.connect(self._on_calib_frame)
         self._worker.calib_done.connect(self._on_calib_done)
-        self._worker.analysis_frame.connect(self._analysis.push)
+        self._worker.analysis_frames.connect(self._analysis.push)
+        self._analysis.set_timings(self._worker.timings)
         self._worker.hud.connect(self._on_hud)
         self._worker.ended.connect(self._on_ended)
         self._worker.go_preview()
@@ -1052,9 +1353,8 @@ class MainWindow(QMainWindow):
         self._calib_overlay.hide()
         self._worker.go_analyze(up, dn)
 
-    def _on_hud(self, counter, stage, feedback, color, fps, back_ang, back_ok, warnings, pct):
-        self._analysis.update_hud(counter, stage, feedback, color, fps, back_ang, back_ok, warnings)
-        self._analysis.set_depth(pct)
+    def _on_hud(self, changes):
+        self._analysis.update_hud(changes)
 
     def _on_ended(self, counter):
         self._stop_worker()
@@ -1074,10 +1374,21 @@ class MainWindow(QMainWindow):
         elif k in (Qt.Key.Key_F11, Qt.Key.Key_F):
             if self.isFullScreen(): self.showNormal()
             else: self.showFullScreen()
+        elif k == Qt.Key.Key_P and self._stack.currentWidget() is self._analysis:
+            self._analysis.toggle_profiler()
+
+
+def preload_detectors():
+    """Loads both detector modes (webcam: live stream, video files: VIDEO) into the pool."""
+    from pose_detector import detector_pool
+    detector_pool.preload({"live_stream": True}, {"live_stream": False})
 
 
 # Entry point
 def main():
+    # The model loads while the user is still on the menu
+    threading.Thread(target=preload_detectors, name="detector-preload", daemon=True).start()
+
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
 
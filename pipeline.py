@@ -0,0 +1,149 @@
+import math
+import queue
+import threading
+from collections import deque
+
+
+class FrameQueue:
+    """Bounded FIFO between pipeline stages.
+
+    With drop=True a full queue discards its oldest item instead of blocking the
+    producer (live sources). With drop=False the producer waits (video files,
+    where every frame must be analysed).
+    """
+
+    def __init__(self, maxsize=2, drop=True):
+        self._items   = deque()
+        self._maxsize = maxsize
+        self._drop    = drop
+        self._cond    = threading.Condition()
+        self._closed  = False
+        self.dropped  = 0
+
+    def put(self, item):
+        """Returns False if the queue was closed before the item could be queued."""
+        with self._cond:
+            while not self._closed and len(self._items) >= self._maxsize:
+                if self._drop:
+                    self._items.popleft()
+                    self.dropped += 1
+                    break
+                self._cond.wait(0.1)
+            if self._closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Returns the next item, or None once the queue is closed and drained.
+        Raises queue.Empty on timeout, like the stdlib queue."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                raise queue.Empty
+            if self._items:
+                item = self._items.popleft()
+                self._cond.notify_all()
+                return item
+            return None
+
+    def close(self):
+        """Ends the stream: consumers drain what is left, producers stop blocking."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Stage(threading.Thread):
+    """Pipeline stage running fn on its own thread.
+
+    A stage with an inbox calls fn(item) for every item and forwards non-None
+    results to the outbox. A source stage (inbox=None) calls fn() repeatedly;
+    returning None ends the stream. The outbox is closed when the stage exits,
+    so end-of-stream propagates downstream.
+    """
+
+    def __init__(self, name, fn, inbox, outbox, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.inbox  = inbox
+        self.outbox = outbox
+        self._fn    = fn
+        self._halt  = stop_event
+
+    def run(self):
+        try:
+            while not self._halt.is_set():
+                if self.inbox is None:
+                    item = self._fn()
+                    if item is None:
+                        break
+                else:
+                    try:
+                        item = self.inbox.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is None:
+                        break
+                    item = self._fn(item)
+                    if item is None:
+                        continue
+                if not self.outbox.put(item):
+                    break
+        finally:
+            self.outbox.close()
+
+
+def run_stages(stages, stop_event):
+    """Starts the given stages; returns a callable that stops and joins them and
+    returns True if they all ended within the timeout. It may be called again."""
+    for s in stages:
+        s.start()
+
+    def shutdown(timeout=2.0):
+        stop_event.set()
+        for s in stages:
+            if s.inbox is not None:
+                s.inbox.close()
+            s.outbox.close()
+        for s in stages:
+            s.join(timeout)
+        return not any(s.is_alive() for s in stages)
+
+    return shutdown
+
+
+class AdaptiveSkipper:
+    """Decides which frames go through the model so the loop holds target_fps.
+
+    The inference stage calls should_infer() for every frame and record() with
+    the model time of the frames it ran. The model then runs on every k-th frame,
+    where k is the smallest stride whose average cost per frame fits the frame
+    budget (up to max_k); the render stage predicts landmarks in between.
+    """
+
+    def __init__(self, target_fps=30.0, max_k=4, smoothing=0.1):
+        self.budget = 1.0 / target_fps if target_fps and target_fps > 0 else 1.0 / 30.0
+        self.max_k  = max_k
+        self.k      = 1
+        self._alpha = smoothing
+        self._avg   = None   # moving average of model time, seconds
+        self._n     = 0
+
+    def should_infer(self):
+        run = self._n % self.k == 0
+        self._n += 1
+        return run
+
+    def record(self, seconds):
+        a = self._alpha
+        self._avg = seconds if self._avg is None else self._avg + a * (seconds - self._avg)
+
+        # Model time over budget, plus 10% headroom for the rest of the frame
+        need = self._avg * 1.1 / self.budget
+        if need > self.k:
+            self.k = min(self.max_k, math.ceil(need))
+            self._n = 1
+        elif self.k > 1 and need < (self.k - 1) * 0.8:
+            # Step down only with margin, so k does not flip between two values
+            self.k -= 1
+            self._n = 1
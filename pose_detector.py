@@ -1,106 +1,375 @@
 import cv2
 import mediapipe as mp
+import numpy as np
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 import os
+import threading
+import time
 import urllib.request
 
+from landmarks import PoseFrame, draw_skeleton
+from landmark_recording import LandmarkRecorder
+
+MODEL_PATH = "pose_landmarker_full.task"
+MODEL_URL  = "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_full/float16/latest/pose_landmarker_full.task"
+
+
+def ensure_model(path=MODEL_PATH):
+    """Downloads the model if it is missing. The file is written under a temporary
+    name and renamed when complete, so no reader ever sees a partial model."""
+    if os.path.exists(path):
+        return path
+    print("Downloading model... (one time only)")
+    tmp = f"{path}.{os.getpid()}.part"
+    try:
+        urllib.request.urlretrieve(MODEL_URL, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    print("Model downloaded!")
+    return path
+
 
 class PoseDetector:
     """Detects human pose landmarks using the MediaPipe Tasks API."""
 
-    LANDMARKS = {
-        "left":  {"hip": 23, "knee": 25, "ankle": 27},
-        "right": {"hip": 24, "knee": 26, "ankle": 28}
-    }
+    # Returned by process_frame in live-stream mode until the first result arrives
+    EMPTY_RESULT = vision.PoseLandmarkerResult(pose_landmarks=[], pose_world_landmarks=[])
+
+    # Longest side of the image the model sees. The landmarker works on 256 px
+    # crops internally, so larger inputs only cost conversion time; landmarks are
+    # normalized and map back onto the full-resolution frame unchanged.
+    INPUT_MAX_SIDE = 640
+
+    # Region of interest: once a pose is tracked, the next frame is cropped to a
+    # padded box around it (in the frame's aspect ratio, so the model input keeps
+    # its size) and the landmarks are mapped back to full-frame coordinates.
+    ROI_PAD      = 0.25  # padding on each side, fraction of the landmark box
+    ROI_MIN_VIS  = 0.5   # below this mean visibility the next frame is searched in full
+    ROI_MIN_FRAC = 0.3   # smallest crop, fraction of the frame size
+    ROI_MAX_FRAC = 0.9   # larger crops are not worth it; use the full frame
 
-    def __init__(self, detection_confidence=0.7, tracking_confidence=0.7):
-        model_path = "pose_landmarker_full.task"
+    def __init__(self, detection_confidence=0.7, tracking_confidence=0.7, live_stream=False):
+        """
+        live_stream=True uses MediaPipe's LIVE_STREAM mode: process_frame submits the
+        frame asynchronously and returns the latest finished result without waiting.
+        MediaPipe drops frames submitted while the model is still busy.
+        """
+        model_path = ensure_model()
 
-        if not os.path.exists(model_path):
-            print("Downloading model... (one time only)")
-            url = "https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_full/float16/latest/pose_landmarker_full.task"
-            urllib.request.urlretrieve(url, model_path)
-            print("Model downloaded!")
+        self.live_stream          = live_stream
+        self.detection_confidence = detection_confidence
+        self.tracking_confidence  = tracking_confidence
+        self._latest       = self.EMPTY_RESULT
+        self._latest_lock  = threading.Lock()
+        self._last_ts      = -1
+        self._reset_ts     = -1   # live results up to this timestamp belong to a previous session
 
         base_options = python.BaseOptions(model_asset_path=model_path)
         options = vision.PoseLandmarkerOptions(
             base_options=base_options,
-            running_mode=vision.RunningMode.VIDEO,
+            running_mode=vision.RunningMode.LIVE_STREAM if live_stream else vision.RunningMode.VIDEO,
             min_pose_detection_confidence=detection_confidence,
-            min_tracking_confidence=tracking_confidence
+            min_tracking_confidence=tracking_confidence,
+            result_callback=self._on_result if live_stream else None
         )
         self.landmarker    = vision.PoseLandmarker.create_from_options(options)
+        self._pose         = PoseFrame()
+        self._record_path  = None
+        self._recorder     = None
         self.frame_index   = 0
         self._ms_per_frame = 33.333  # default 30 fps; override with set_fps()
+        self._ts_base      = 0
+        self.timings       = None  # optional profiler.StageTimings ("convert", "inference")
+        self.input_max_side = self.INPUT_MAX_SIDE
+        self._small        = None  # reused resize and RGB buffers
+        self._rgb          = None
+        self.use_roi       = True
+        self._roi          = None  # (x, y, w, h) crop for the next frame, None = full frame
+        self._crops        = {}    # live stream: timestamp -> (roi, frame w, frame h)
 
     def set_fps(self, fps: float):
-        """Sets source FPS so timestamps are accurate."""
+        """Sets source FPS so timestamps are accurate.
+        Timestamps restart from the last one, so one detector can process several videos;
+        the crop of the previous video is dropped."""
         if fps and fps > 0:
             self._ms_per_frame = 1000.0 / fps
+            self._ts_base      = self._last_ts + 1
+            self.frame_index   = 0
+        self._roi = None
+        with self._latest_lock:
+            self._crops.clear()
+
+    def skip_frame(self):
+        """Advances the VIDEO-mode clock for a frame that is not run through the model."""
+        self.frame_index += 1
+
+    def set_input_size(self, max_side):
+        """Longest side of the model input in pixels; None or 0 feeds full frames."""
+        self.input_max_side = max_side or None
+
+    def _input_size(self, w, h):
+        """Model input size (w, h) for a w x h frame."""
+        m = self.input_max_side
+        if m and max(h, w) > m:
+            scale = m / max(h, w)
+            return max(1, round(w * scale)), max(1, round(h * scale))
+        return w, h
+
+    def _to_rgb(self, frame, size):
+        """Resizes (if needed) and converts the frame or crop into preallocated buffers.
+        mp.Image copies its input, so the buffers can be reused right away."""
+        h, w = frame.shape[:2]
+        src  = frame
+        if (w, h) != size:
+            if self._small is None or self._small.shape[1::-1] != size:
+                self._small = np.empty((size[1], size[0], 3), np.uint8)
+            cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+            src = self._small
+        if self._rgb is None or self._rgb.shape != src.shape:
+            self._rgb = np.empty(src.shape, np.uint8)
+        cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        return self._rgb
+
+    def _uncrop(self, result, roi, w, h):
+        """Maps landmarks detected in the crop roi back to normalized full-frame coordinates."""
+        if roi is None:
+            return
+        x0, y0, cw, ch = roi
+        sx, sy = cw / w, ch / h
+        ox, oy = x0 / w, y0 / h
+        for pose in result.pose_landmarks:
+            for lm in pose:
+                lm.x = lm.x * sx + ox
+                lm.y = lm.y * sy + oy
+                lm.z = lm.z * sx  # z shares the scale of x
+        # pose_world_landmarks are metric and hip-centred, so the crop does not affect them
+
+    def _next_roi(self, result, w, h):
+        """Crop for the next frame from this frame's (full-frame) landmarks, or None."""
+        if not self.use_roi or not result.pose_landmarks:
+            return None
+        lms = result.pose_landmarks[0]
+        if sum(lm.visibility for lm in lms) / len(lms) < self.ROI_MIN_VIS:
+            return None
+
+        xs = [min(max(lm.x, 0.0), 1.0) * w for lm in lms]
+        ys = [min(max(lm.y, 0.0), 1.0) * h for lm in lms]
+        bx0, bx1, by0, by1 = min(xs), max(xs), min(ys), max(ys)
+
+        pad   = 1.0 + 2.0 * self.ROI_PAD
+        scale = max((bx1 - bx0) * pad / w, (by1 - by0) * pad / h, self.ROI_MIN_FRAC)
+        if scale >= self.ROI_MAX_FRAC:
+            return None
+        cw, ch = round(w * scale), round(h * scale)
+
+        # Keep the current crop while the pose stays well inside it and it is not much
+        # too big: a steady crop lets MediaPipe's own tracking carry over between frames
+        old = self._roi
+        if old:
+            ox, oy, ow, oh = old
+            mx, my = ow * 0.05, oh * 0.05
+            if (bx0 >= ox + mx and bx1 <= ox + ow - mx and by0 >= oy + my and by1 <= oy + oh - my
+                    and ow <= cw * 1.5):
+                return old
+
+        x0 = round(min(max((bx0 + bx1 - cw) / 2, 0), w - cw))
+        y0 = round(min(max((by0 + by1 - ch) / 2, 0), h - ch))
+        return x0, y0, cw, ch
+
+    def reset(self):
+        """
+        Prepares a used detector for a new session: stops recording, forgets the last
+        live result and the profiler. The landmarker itself is kept, so timestamps
+        continue from the last one (MediaPipe rejects timestamps that go backwards).
+        """
+        self.stop_recording()
+        with self._latest_lock:
+            self._latest   = self.EMPTY_RESULT
+            self._reset_ts = self._last_ts
+            self._crops.clear()
+        self.timings       = None
+        self._ms_per_frame = 33.333
+        self._ts_base      = self._last_ts + 1
+        self.frame_index   = 0
+        self._roi          = None
+
+    def close(self):
+        """Frees the landmarker; the detector cannot be used afterwards."""
+        self.stop_recording()
+        self.landmarker.close()
+
+    def start_recording(self, path):
+        """Records every result from now on into a .lmk file (see landmark_recording)."""
+        self.stop_recording()
+        self._record_path = path
+
+    def stop_recording(self):
+        # Lock: in live-stream mode results are recorded from MediaPipe's thread
+        with self._latest_lock:
+            self._record_path = None
+            if self._recorder:
+                self._recorder.close()
+                self._recorder = None
+
+    def _record(self, result, timestamp_ms):
+        lms = result.pose_landmarks[0] if result.pose_landmarks else None
+        self._recorder.write(timestamp_ms / 1000.0, lms)
 
     def process_frame(self, frame):
-        rgb_frame    = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image     = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
+        if self._record_path and self._recorder is None:
+            h, w = frame.shape[:2]
+            self._recorder = LandmarkRecorder(self._record_path, w, h, 1000.0 / self._ms_per_frame)
+
+        t0           = time.perf_counter()
+        h, w         = frame.shape[:2]
+        roi          = self._roi
+        if roi is not None and (roi[0] + roi[2] > w or roi[1] + roi[3] > h):
+            roi = self._roi = None  # crop from a larger frame: search this one in full
+        src          = frame if roi is None else frame[roi[1]:roi[1] + roi[3], roi[0]:roi[0] + roi[2]]
+        mp_image     = mp.Image(image_format=mp.ImageFormat.SRGB, data=self._to_rgb(src, self._input_size(w, h)))
+        if self.timings:
+            t0 = self.timings.since("convert", t0)
+
+        if self.live_stream:
+            # Wall-clock timestamps; must still be strictly increasing
+            timestamp_ms  = max(int(time.monotonic() * 1000), self._last_ts + 1)
+            self._last_ts = timestamp_ms
+            self.frame_index += 1
+            # The result arrives on another thread; remember which crop it belongs to
+            with self._latest_lock:
+                self._crops[timestamp_ms] = (roi, w, h)
+            self.landmarker.detect_async(mp_image, timestamp_ms)
+            return self.latest_result()
+
         # Strictly monotonic; reflects real inter-frame interval
-        timestamp_ms = int(self.frame_index * self._ms_per_frame)
+        timestamp_ms  = self._ts_base + int(self.frame_index * self._ms_per_frame)
+        self._last_ts = timestamp_ms
         self.frame_index += 1
-        return self.landmarker.detect_for_video(mp_image, timestamp_ms)
+        result = self.landmarker.detect_for_video(mp_image, timestamp_ms)
+        self._uncrop(result, roi, w, h)
+        self._roi = self._next_roi(result, w, h)
+        if self.timings:
+            self.timings.since("inference", t0)
+        if self._recorder:
+            self._record(result, timestamp_ms)
+        return result
+
+    def latest_result(self):
+        """Most recent live-stream result (may belong to an earlier frame)."""
+        with self._latest_lock:
+            return self._latest
+
+    def _on_result(self, result, output_image, timestamp_ms):
+        # Called from MediaPipe's worker thread
+        if self.timings:
+            # Submit-to-result latency; live timestamps are monotonic wall-clock ms
+            self.timings.add("inference", time.monotonic() - timestamp_ms / 1000.0)
+        with self._latest_lock:
+            if timestamp_ms <= self._reset_ts:
+                return  # late result of the previous session
+            # Frames MediaPipe dropped never get a result; forget their crops too
+            crop = None
+            while self._crops:
+                ts = next(iter(self._crops))
+                if ts > timestamp_ms:
+                    break
+                c = self._crops.pop(ts)
+                if ts == timestamp_ms:
+                    crop = c
+            if crop:
+                roi, w, h = crop
+                self._uncrop(result, roi, w, h)
+                self._roi = self._next_roi(result, w, h)
+            self._latest = result
+            if self._recorder:
+                self._record(result, timestamp_ms)
 
     def get_landmarks(self, results, frame_shape, leg="left"):
-        """Returns 2D pixel coords and normalized 3D coords for the given leg."""
+        """
+        Fills and returns the detector's PoseFrame (pixel and normalized 3D accessors for `leg`).
+        Pass the shape of the full-resolution frame: landmarks are normalized, so they
+        land on it regardless of the inference size.
+        The same object is reused on every call, so copy() it to keep a frame around.
+        """
         if not results.pose_landmarks or len(results.pose_landmarks) == 0:
             return None
 
-        h, w, _   = frame_shape
-        landmarks = results.pose_landmarks[0]
-        indices   = self.LANDMARKS[leg]
-        shoulder_index = 11 if leg == "left" else 12
-
-        def get_2d(index):
-            lm = landmarks[index]
-            return [int(lm.x * w), int(lm.y * h)]
-
-        def get_3d(index):
-            lm = landmarks[index]
-            return [lm.x, lm.y, lm.z]
-
-        return {
-            # 2D for rendering
-            "shoulder": get_2d(shoulder_index),
-            "hip":      get_2d(indices["hip"]),
-            "knee":     get_2d(indices["knee"]),
-            "ankle":    get_2d(indices["ankle"]),
-
-            # 3D for accurate angle calculations
-            "hip_3d":      get_3d(indices["hip"]),
-            "knee_3d":     get_3d(indices["knee"]),
-            "ankle_3d":    get_3d(indices["ankle"]),
-            "shoulder_3d": get_3d(shoulder_index),
-
-            # Hip Z-depth for camera angle estimation
-            "left_hip_z":  landmarks[23].z,
-            "right_hip_z": landmarks[24].z,
-        }
-
-    def draw_skeleton(self, frame, results):
-        if not results.pose_landmarks or len(results.pose_landmarks) == 0:
-            return
+        h, w = frame_shape[:2]
+        self._pose.leg = leg
+        return self._pose.fill(results.pose_landmarks[0], w, h)
+
+    def draw_skeleton(self, frame, pose):
+        """Draws all landmarks and connections of a PoseFrame."""
+        draw_skeleton(frame, pose)
+
+
+class DetectorPool:
+    """
+    Process-wide cache of loaded PoseDetectors, so the model is read and the
+    landmarker graph built once rather than on every session.
+
+    Detectors are keyed by their constructor arguments. acquire() hands out an idle
+    one (waiting for it if preload() is still loading it) or creates a new one;
+    release() resets it and puts it back.
+    """
 
-        h, w, _   = frame.shape
-        landmarks = results.pose_landmarks[0]
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._idle    = {}   # key -> [PoseDetector]
+        self._loading = {}   # key -> threading.Event set when the load finishes
 
-        connections = [
-            (11, 12), (11, 13), (13, 15), (12, 14), (14, 16),
-            (11, 23), (12, 24), (23, 24), (23, 25), (24, 26),
-            (25, 27), (26, 28), (27, 29), (28, 30), (29, 31), (30, 32)
-        ]
+    @staticmethod
+    def _key(detection_confidence=0.7, tracking_confidence=0.7, live_stream=False):
+        return (detection_confidence, tracking_confidence, bool(live_stream))
+
+    def preload(self, *configs):
+        """
+        Loads one detector per config (dicts of PoseDetector arguments) that has none
+        idle yet. Blocks until done, so call it from a background thread.
+        """
+        keys = []
+        with self._lock:
+            for cfg in configs:
+                key = self._key(**cfg)
+                if not self._idle.get(key) and key not in self._loading:
+                    self._loading[key] = threading.Event()
+                    keys.append(key)
+
+        # One at a time: the first load may also download the model file
+        for key in keys:
+            try:
+                detector = PoseDetector(*key)
+            except Exception as e:
+                print(f"[DetectorPool] preload failed: {e}")
+                detector = None
+            with self._lock:
+                if detector is not None:
+                    self._idle.setdefault(key, []).append(detector)
+                self._loading.pop(key).set()
+
+    def acquire(self, detection_confidence=0.7, tracking_confidence=0.7, live_stream=False):
+        key = self._key(detection_confidence, tracking_confidence, live_stream)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop()
+                loading = self._loading.get(key)
+            if loading is None:
+                return PoseDetector(*key)
+            loading.wait()
+
+    def release(self, detector):
+        """Returns a detector from acquire() to the pool. Replay detectors are ignored."""
+        if not isinstance(detector, PoseDetector):
+            return
+        detector.reset()
+        key = self._key(detector.detection_confidence, detector.tracking_confidence, detector.live_stream)
+        with self._lock:
+            self._idle.setdefault(key, []).append(detector)
 
-        for start, end in connections:
-            x1, y1 = int(landmarks[start].x * w), int(landmarks[start].y * h)
-            x2, y2 = int(landmarks[end].x * w),   int(landmarks[end].y * h)
-            cv2.line(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
 
-        for lm in landmarks:
-            cx, cy = int(lm.x * w), int(lm.y * h)
-            cv2.circle(frame, (cx, cy), 4, (255, 255, 255), -1)
\ No newline at end of file
+detector_pool = DetectorPool()
@@ -1,7 +1,7 @@
-import cv2
 import time
 import numpy as np
 from angle_calculator import calculate_angle_3d, get_best_leg
+from rep_counter import thresholds
 
 
 class Calibrator:
@@ -18,17 +18,17 @@ class Calibrator:
 
     def run_headless(self, cap, set_frame_callback):
         """
-        Калибровка без GUI — кадры передаются в браузер через callback.
+        Калибровка без GUI — каждый нарисованный BGR кадр передаётся в callback,
+        кодирование в JPEG делает стрим (только если есть зрители).
         """
         up_angle   = self._calibrate_phase_headless(cap, phase="UP",   set_frame=set_frame_callback)
         down_angle = self._calibrate_phase_headless(cap, phase="DOWN", set_frame=set_frame_callback)
 
-        up_threshold   = round(up_angle * 0.85, 1)
-        down_threshold = round(down_angle * 1.25, 1)
+        up_threshold, down_threshold = thresholds(up_angle, down_angle)
 
         print(f"\nHeadless calibration complete!")
         print(f"Standing angle: {up_angle} deg  → UP threshold: {up_threshold}")
-        print(f"Squat angle:    {down_angle} deg → DOWN threshold: {down_threshold}")
+        print(f"Squat angle:    {down_angle} deg → rep depth threshold: {down_threshold}")
 
         return {
             "up_angle":   up_threshold,
@@ -47,8 +47,7 @@ class Calibrator:
                 break
             remaining = int(deadline - time.time()) + 1
             self.renderer.draw_calibration_overlay(frame, phase, remaining)
-            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            set_frame(jpeg.tobytes())
+            set_frame(frame)
 
         # Сбор углов 2 секунды
         angles   = []
@@ -70,8 +69,7 @@ class Calibrator:
                 angle = None
 
             self.renderer.draw_calibration_overlay(frame, phase, 0, angle)
-            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-            set_frame(jpeg.tobytes())
+            set_frame(frame)
 
         if not angles:
             print(f"Warning: could not measure {phase} angle, using default.")
@@ -1,177 +1,220 @@
 import cv2
 import sys
 import os
+import json
+import uuid
+import queue
+import argparse
 import threading
-import time
 from flask import Flask, jsonify, request, send_from_directory, Response
 
 # Добавляем путь к родительской папке чтобы импортировать модули проекта
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# ...и корень репозитория после неё: общий rep_counter (модули preview/ важнее одноимённых)
+sys.path.insert(1, os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from pose_detector import PoseDetector
-from angle_calculator import (
-    calculate_angle_3d, calculate_back_angle,
-    calculate_knee_deviation_3d, estimate_camera_angle, get_best_leg
-)
-from ui_renderer import UIRenderer
-from calibration import Calibrator
+from tracker import initial_state, run_tracker
+from tracker_process import ProcessTracker
 
 # ── ИСПРАВЛЕНИЕ: указываем абсолютный путь к папке web ────────────────────
 WEB_DIR     = os.path.dirname(os.path.abspath(__file__))
 LANDING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'landing')
 
 app = Flask(__name__, static_folder=WEB_DIR)
-
-# ── Глобальное состояние ───────────────────────────────────────────────────
-state = {
-    "running":    False,
-    "counter":    0,
-    "stage":      None,
-    "angle":      0,
-    "feedback":   "Stand in front of camera",
-    "warnings":   [],
-    "back_angle": 0,
-    "back_ok":    True,
-}
-
-frame_lock    = threading.Lock()
-current_frame = None
-stop_event    = threading.Event()
-
-
-def set_current_frame(jpeg_bytes):
-    """Записывает новый JPEG кадр в буфер стрима. Вызывается из tracker и calibration."""
-    global current_frame
-    with frame_lock:
-        current_frame = jpeg_bytes
-
-
-def tracker_thread(source, path=""):
-    """Запускается в отдельном потоке. Обрабатывает видео и обновляет state."""
-    detector = PoseDetector(detection_confidence=0.7, tracking_confidence=0.7)
-    renderer = UIRenderer()
-
-    cap = cv2.VideoCapture(path if source == "video" and path else 0)
-
-    if not cap.isOpened():
-        state["running"] = False
-        return
-
-    # ── Headless калибровка — кадры идут прямо в браузер ──────────────────
-    state["feedback"] = "Calibrating: stand straight..."
-    calibrator = Calibrator(detector)
-    thresholds = calibrator.run_headless(cap, set_current_frame)
-
-    SQUAT_UP_ANGLE   = thresholds["up_angle"]
-    SQUAT_DOWN_ANGLE = thresholds["down_angle"]
-
-    state["feedback"] = "Calibration complete! Start squatting."
-
-    min_angle_reached    = 180
-    camera_warning_timer = 0
-    last_cam_deviation   = 0
-
-    stop_event.clear()
-
-    while not stop_event.is_set():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        results   = detector.process_frame(frame)
-        detector.draw_skeleton(frame, results)
-
-        leg       = get_best_leg(results)
-        landmarks = detector.get_landmarks(results, frame.shape, leg=leg)
-
-        feedback   = "Stand in front of camera"
-        color      = renderer.COLOR_YELLOW
-        angle      = 0
-        warnings   = []
-        back_angle = 0
-        back_ok    = True
-
-        if landmarks:
-            shoulder = landmarks["shoulder"]
-            hip      = landmarks["hip"]
-            knee     = landmarks["knee"]
-            ankle    = landmarks["ankle"]
-
-            cam_pos, cam_dev = estimate_camera_angle({
-                "left_hip_z":  landmarks["left_hip_z"],
-                "right_hip_z": landmarks["right_hip_z"]
-            })
-            if cam_pos == "diagonal":
-                last_cam_deviation   = cam_dev
-                camera_warning_timer = 90
-
-            angle      = calculate_angle_3d(landmarks["hip_3d"], landmarks["knee_3d"], landmarks["ankle_3d"])
-            back_angle = calculate_back_angle(shoulder, hip)
-            knee_dev   = calculate_knee_deviation_3d(landmarks["knee_3d"], landmarks["ankle_3d"], landmarks["hip_3d"])
-
-            back_ok = back_angle <= 35
-
-            if not back_ok and state["stage"] == "DOWN":
-                warnings.append("! Round back")
-            if knee_dev < -0.15 and state["stage"] == "DOWN":
-                warnings.append("! Knees caving in")
-
-            if state["stage"] == "DOWN":
-                min_angle_reached = min(min_angle_reached, angle)
-
-            if angle > SQUAT_UP_ANGLE:
-                if state["stage"] == "DOWN":
-                    if min_angle_reached <= SQUAT_DOWN_ANGLE:
-                        state["counter"] += 1
-                        feedback = "Great! Stand up!"
-                        color    = renderer.COLOR_GREEN
-                    else:
-                        feedback = f"Not deep enough! Min: {int(min_angle_reached)} deg"
-                        color    = renderer.COLOR_RED
-                    min_angle_reached = 180
-                else:
-                    feedback = "Good! Go down!"
-                    color    = renderer.COLOR_GREEN
-                state["stage"] = "UP"
-
-            elif angle < SQUAT_DOWN_ANGLE:
-                state["stage"] = "DOWN"
-                feedback = "Great depth! Stand up!"
-                color    = renderer.COLOR_GREEN
-            else:
-                if state["stage"] == "DOWN":
-                    feedback = f"Lower! Need < {int(SQUAT_DOWN_ANGLE)} deg"
-                    color    = renderer.COLOR_RED
-                else:
-                    feedback = "Good! Go down!"
-                    color    = renderer.COLOR_GREEN
-
-            renderer.draw_joint_lines(frame, hip, knee, ankle, color)
-            renderer.draw_angle(frame, knee, angle, color)
-            renderer.draw_back_angle(frame, back_angle, back_ok)
-
-            if camera_warning_timer > 0:
-                renderer.draw_camera_warning(frame, last_cam_deviation)
-                camera_warning_timer -= 1
-
-        renderer.draw_header(frame, state["counter"], state["stage"])
-        renderer.draw_feedback(frame, feedback, color)
-        renderer.draw_form_warnings(frame, warnings)
-
-        # Обновляем глобальный state
-        state["angle"]      = int(angle)
-        state["feedback"]   = feedback
-        state["warnings"]   = warnings
-        state["back_angle"] = int(back_angle)
-        state["back_ok"]    = back_ok
-
-        # Отправляем кадр в браузерный стрим
-        _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-        set_current_frame(jpeg.tobytes())
-
-    cap.release()
-    state["running"] = False
-    state["stage"]   = None
+# /api/sessions/default/... не перенаправляется на старые маршруты /api/...
+app.url_map.redirect_defaults = False
+
+# ── Сессии ─────────────────────────────────────────────────────────────────
+# Каждая станция — отдельная сессия со своим трекером, PoseDetector, state,
+# стримом кадров и SSE. Старые маршруты /api/... работают с сессией "default".
+
+DEFAULT_SESSION = "default"
+
+# Сколько трекеров может работать одновременно: по умолчанию половина ядер
+# (MediaPipe сам использует несколько потоков); переопределяется
+# переменной AFC_MAX_SESSIONS или флагом --max-sessions
+MAX_SESSIONS = int(os.environ.get("AFC_MAX_SESSIONS", 0)) or max(1, (os.cpu_count() or 2) // 2)
+
+# Трекеры в отдельных процессах (AFC_TRACKER_PROCESSES=1 или --processes):
+# процесс Flask только раздаёт кадры и события, GIL с трекерами не делится
+TRACKER_PROCESSES = os.environ.get("AFC_TRACKER_PROCESSES", "") not in ("", "0")
+
+
+# ── Видеострим: один опубликованный кадр, клиенты ждут следующий ─────────
+
+class FrameBroadcaster:
+    """Хранит последний кадр (BGR) и его номер. Генераторы стрима спят на
+    Condition и просыпаются только при новом кадре; кадры, которые клиент
+    не успел забрать, просто пропускаются.
+
+    JPEG кодируется лениво, в потоке клиента: только если кадр кто-то смотрит,
+    и один раз на кадр для каждого варианта (ширина, качество) — все клиенты
+    одного варианта получают одни и те же байты."""
+
+    def __init__(self):
+        self._cond      = threading.Condition()
+        self._frame     = None
+        self._seq       = 0
+        self._encoded   = {}   # (ширина, качество) -> (seq, jpeg bytes)
+        self._enc_locks = {}
+        self.viewers    = 0    # открытые стримы; без них кадр можно не готовить вовсе
+        self._vlock     = threading.Lock()
+
+    def watch(self):
+        with self._vlock:
+            self.viewers += 1
+
+    def unwatch(self):
+        with self._vlock:
+            self.viewers -= 1
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq  += 1
+            self._cond.notify_all()
+
+    def clear(self):
+        self.publish(None)
+
+    def wait_next(self, last_seq, variant=(0, 80), timeout=1.0):
+        """Возвращает (seq, jpeg) новее last_seq, либо (last_seq, None) по таймауту."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq != last_seq, timeout):
+                return last_seq, None
+            seq, frame = self._seq, self._frame
+        if frame is None:
+            return seq, None
+        return seq, self._encode(seq, frame, variant)
+
+    def _encode(self, seq, frame, variant):
+        # Один кодирующий поток на вариант; остальные клиенты ждут и берут готовое
+        with self._enc_locks.setdefault(variant, threading.Lock()):
+            cached = self._encoded.get(variant)
+            if cached and cached[0] >= seq:
+                return cached[1]
+
+            width, quality = variant
+            h, w = frame.shape[:2]
+            if 0 < width < w:
+                frame = cv2.resize(frame, (width, h * width // w), interpolation=cv2.INTER_AREA)
+            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            data = jpeg.tobytes()
+            self._encoded[variant] = (seq, data)
+            return data
+
+
+# ── Push-канал (SSE): события трекера вместо опроса /api/status ───────────
+
+class EventHub:
+    """Рассылает события подписчикам /api/events. У каждого клиента своя очередь:
+    медленный клиент теряет самые старые события, но не тормозит трекер."""
+
+    def __init__(self, maxsize=64):
+        self._lock    = threading.Lock()
+        self._clients = set()
+        self._maxsize = maxsize
+
+    def subscribe(self):
+        q = queue.Queue(self._maxsize)
+        with self._lock:
+            self._clients.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._clients.discard(q)
+
+    def publish(self, event, data):
+        msg = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        with self._lock:
+            clients = list(self._clients)
+        for q in clients:
+            while True:
+                try:
+                    q.put_nowait(msg)
+                    break
+                except queue.Full:
+                    # Очередь полна — выкидываем самое старое событие
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+class ThreadTracker:
+    """Трекер сессии в потоке сервера; сам служит sink для run_tracker.
+    Свой флаг остановки на каждый запуск: трекер прошлого запуска, который ещё
+    не успел завершиться, не сможет писать в state нового."""
+
+    def __init__(self, session, source, path="", camera=0):
+        self.session = session
+        self.state   = session.state
+        self._stop   = threading.Event()
+        threading.Thread(target=run_tracker, args=(self, source, path, camera),
+                         name=f"tracker-{session.id}", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stopped(self):
+        return self._stop.is_set()
+
+    def update_state(self, **fields):
+        if not self.stopped():
+            self.session.update_state(**fields)
+
+    def publish_event(self, name, data):
+        if not self.stopped():
+            self.session.events.publish(name, data)
+
+    def publish_frame(self, frame, landmarks=None):
+        if not self.stopped():
+            self.session.landmarks = landmarks
+            self.session.frames.publish(frame)
+
+
+class Session:
+    """Одна станция: свой трекер (поток или процесс), state, стрим кадров,
+    последние landmarks и подписчики SSE."""
+
+    def __init__(self, sid):
+        self.id        = sid
+        self.state     = initial_state()
+        self.frames    = FrameBroadcaster()
+        self.events    = EventHub()
+        self.landmarks = None   # (33, 4) float32 последнего кадра или None
+        self._tracker  = None
+
+    @property
+    def running(self):
+        return self.state["running"]
+
+    def update_state(self, **fields):
+        """Обновляет state и рассылает только изменившиеся поля (событие "state")."""
+        changed = {k: v for k, v in fields.items() if self.state.get(k) != v}
+        if changed:
+            self.state.update(changed)
+            self.events.publish("state", changed)
+
+    def start(self, source, path="", camera=0):
+        self.update_state(running=True, counter=0, stage=None)
+        backend = ProcessTracker if TRACKER_PROCESSES else ThreadTracker
+        self._tracker = backend(self, source, path, camera)
+
+    def stop(self):
+        if self._tracker is not None:
+            self._tracker.stop()
+        self.update_state(running=False)
+        self.frames.clear()
+        self.landmarks = None
+
+    def status(self):
+        return {"session": self.id, **self.state}
+
+
+sessions      = {DEFAULT_SESSION: Session(DEFAULT_SESSION)}
+sessions_lock = threading.Lock()
 
 
 # ── Flask routes ───────────────────────────────────────────────────────────
@@ -189,73 +232,165 @@ def static_files(filename):
     return send_from_directory(WEB_DIR, filename)
 
 
-@app.route('/api/start', methods=['POST'])
-def start():
-    if state["running"]:
-        return jsonify({"status": "already_running"})
+def get_session(sid):
+    with sessions_lock:
+        return sessions.get(sid)
 
-    data   = request.get_json() or {}
-    source = data.get('source', 'webcam')
-    path   = data.get('path', '')
 
-    state["running"] = True
-    state["counter"] = 0
-    state["stage"]   = None
+@app.route('/api/sessions', methods=['GET'])
+def list_sessions():
+    with sessions_lock:
+        items = list(sessions.values())
+    return jsonify({
+        "max_running": MAX_SESSIONS,
+        "backend":     "process" if TRACKER_PROCESSES else "thread",
+        "sessions":    [{"session": s.id, "running": s.running, "counter": s.state["counter"]} for s in items],
+    })
 
-    t = threading.Thread(target=tracker_thread, args=(source, path), daemon=True)
-    t.start()
 
-    return jsonify({"status": "started"})
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    data = request.get_json(silent=True) or {}
+    sid  = str(data.get('id') or uuid.uuid4().hex[:8])
+    with sessions_lock:
+        if sid not in sessions:
+            sessions[sid] = Session(sid)
+    return jsonify({"session": sid}), 201
 
 
-@app.route('/api/stop', methods=['POST'])
-def stop():
-    global current_frame
-    stop_event.set()
-    state["running"] = False
-    with frame_lock:
-        current_frame = None
-    return jsonify({"status": "stopped"})
+@app.route('/api/sessions/<sid>', methods=['DELETE'])
+def delete_session(sid):
+    with sessions_lock:
+        session = sessions.pop(sid, None) if sid != DEFAULT_SESSION else sessions.get(sid)
+    if session is None:
+        return jsonify({"error": "unknown session"}), 404
+    session.stop()
+    return jsonify({"status": "deleted" if sid != DEFAULT_SESSION else "stopped"})
 
 
-@app.route('/api/status', methods=['GET'])
-def status():
-    return jsonify({
-        "running":    state["running"],
-        "counter":    state["counter"],
-        "stage":      state["stage"],
-        "angle":      state["angle"],
-        "feedback":   state["feedback"],
-        "warnings":   state["warnings"],
-        "back_angle": state["back_angle"],
-        "back_ok":    state["back_ok"],
-    })
-
+@app.route('/api/start', methods=['POST'], defaults={'sid': DEFAULT_SESSION})
+@app.route('/api/sessions/<sid>/start', methods=['POST'])
+def start(sid):
+    data   = request.get_json(silent=True) or {}
+    source = data.get('source', 'webcam')
+    path   = data.get('path', '')
+    camera = int(data.get('camera', 0))
+
+    # Проверка лимита и запуск под одной блокировкой, чтобы не превысить его гонкой
+    with sessions_lock:
+        session = sessions.get(sid)
+        if session is None:
+            return jsonify({"error": "unknown session"}), 404
+        if session.running:
+            return jsonify({"status": "already_running"})
+        if sum(s.running for s in sessions.values()) >= MAX_SESSIONS:
+            return jsonify({"status": "busy", "max_running": MAX_SESSIONS}), 429
+        session.start(source, path, camera)
+
+    return jsonify({"status": "started", "session": sid})
+
+
+@app.route('/api/stop', methods=['POST'], defaults={'sid': DEFAULT_SESSION})
+@app.route('/api/sessions/<sid>/stop', methods=['POST'])
+def stop(sid):
+    session = get_session(sid)
+    if session is None:
+        return jsonify({"error": "unknown session"}), 404
+    session.stop()
+    return jsonify({"status": "stopped"})
 
-def generate_frames():
-    """Генератор MJPEG стрима — отдаёт кадры браузеру."""
-    while True:
-        with frame_lock:
-            frame = current_frame
 
-        if frame:
-            yield (
-                b'--frame\r\n'
-                b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n'
-            )
-        else:
-            time.sleep(0.03)
+@app.route('/api/status', methods=['GET'], defaults={'sid': DEFAULT_SESSION})
+@app.route('/api/sessions/<sid>/status', methods=['GET'])
+def status(sid):
+    session = get_session(sid)
+    if session is None:
+        return jsonify({"error": "unknown session"}), 404
+    return jsonify(session.status())
+
+
+@app.route('/api/landmarks', methods=['GET'], defaults={'sid': DEFAULT_SESSION})
+@app.route('/api/sessions/<sid>/landmarks', methods=['GET'])
+def landmarks(sid):
+    session = get_session(sid)
+    if session is None:
+        return jsonify({"error": "unknown session"}), 404
+    lm = session.landmarks
+    # Нормализованные x, y, z и visibility всех 33 точек последнего кадра
+    return jsonify({"session": sid, "landmarks": None if lm is None else lm.round(4).tolist()})
+
+
+def generate_frames(frames, variant):
+    """Генератор MJPEG стрима — отдаёт браузеру каждый новый кадр ровно один раз."""
+    frames.watch()
+    try:
+        seq = 0
+        while True:
+            seq, jpeg = frames.wait_next(seq, variant)
+            if jpeg:
+                yield (
+                    b'--frame\r\n'
+                    b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+                )
+    finally:
+        frames.unwatch()
+
+
+def generate_events(session, q):
+    """Генератор SSE: сначала полный снимок state, дальше события из очереди клиента."""
+    try:
+        yield f"event: state\ndata: {json.dumps(session.status(), ensure_ascii=False)}\n\n"
+        while True:
+            try:
+                yield q.get(timeout=15)
+            except queue.Empty:
+                # Комментарий-пинг держит соединение живым через прокси
+                yield ": ping\n\n"
+    finally:
+        session.events.unsubscribe(q)
+
+
+@app.route('/api/events', defaults={'sid': DEFAULT_SESSION})
+@app.route('/api/sessions/<sid>/events')
+def event_stream(sid):
+    session = get_session(sid)
+    if session is None:
+        return jsonify({"error": "unknown session"}), 404
+    return Response(
+        generate_events(session, session.events.subscribe()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
-@app.route('/api/stream')
-def stream():
+@app.route('/api/stream', defaults={'sid': DEFAULT_SESSION})
+@app.route('/api/sessions/<sid>/stream')
+def stream(sid):
+    session = get_session(sid)
+    if session is None:
+        return jsonify({"error": "unknown session"}), 404
+    # ?w=640&q=60 — ширина (0 = исходная) и качество JPEG; округляем,
+    # чтобы похожие запросы попадали в один общий вариант
+    width   = max(0, min(request.args.get('w', 0, type=int), 3840)) // 16 * 16
+    quality = max(10, min(request.args.get('q', 80, type=int), 95)) // 5 * 5
     return Response(
-        generate_frames(),
+        generate_frames(session.frames, (width, quality)),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
 
 if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="AI Fitness Coach web server")
+    ap.add_argument("--port", type=int, default=5000)
+    ap.add_argument("--max-sessions", type=int, default=MAX_SESSIONS,
+                    help="сколько трекеров может работать одновременно")
+    ap.add_argument("--processes", action="store_true", default=TRACKER_PROCESSES,
+                    help="запускать каждый трекер в отдельном процессе")
+    args = ap.parse_args()
+    MAX_SESSIONS      = max(1, args.max_sessions)
+    TRACKER_PROCESSES = args.processes
+
     print("\n=== AI Fitness Coach Web Server ===")
-    print("Open: http://localhost:5000")
-    app.run(debug=False, port=5000, threaded=True)
\ No newline at end of file
+    print(f"Open: http://localhost:{args.port}  (max {MAX_SESSIONS} running sessions, "
+          f"trackers in {'processes' if TRACKER_PROCESSES else 'threads'})")
+    app.run(debug=False, port=args.port, threaded=True)
\ No newline at end of file
@@ -0,0 +1,159 @@
+import cv2
+import numpy as np
+
+from pose_detector import PoseDetector
+from angle_calculator import (
+    calculate_angle_3d, calculate_back_angle,
+    calculate_knee_deviation_3d, estimate_camera_angle, get_best_leg
+)
+from ui_renderer import UIRenderer
+from calibration import Calibrator
+from rep_counter import DOWN, REP, SHALLOW_REP, RepCounter
+
+# Трекер одной сессии, отделённый от Flask: он ничего не знает о том, в каком
+# процессе работает. Всё, что он производит, уходит в sink:
+#   sink.state                       — текущий state (только чтение)
+#   sink.stopped()                   — пора ли остановиться
+#   sink.update_state(**fields)      — изменения state
+#   sink.publish_event(name, data)   — разовые события ("rep", "shallow_rep")
+#   sink.publish_frame(frame, lm)    — нарисованный кадр BGR и landmarks (33, 4) или None
+
+NUM_LANDMARKS = 33
+
+
+def initial_state():
+    return {
+        "running":    False,
+        "counter":    0,
+        "stage":      None,
+        "angle":      0,
+        "feedback":   "Stand in front of camera",
+        "warnings":   [],
+        "back_angle": 0,
+        "back_ok":    True,
+    }
+
+
+def landmarks_array(results, out=None):
+    """Landmarks первой позы как массив (33, 4) float32: x, y, z, visibility (или None)."""
+    if not results.pose_landmarks:
+        return None
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 4), np.float32)
+    for i, lm in enumerate(results.pose_landmarks[0]):
+        out[i] = (lm.x, lm.y, lm.z, lm.visibility)
+    return out
+
+
+def run_tracker(sink, source, path="", camera=0):
+    """Обрабатывает видео и отдаёт state, события и кадры в sink, пока sink не остановлен."""
+    state = sink.state
+
+    detector = PoseDetector(detection_confidence=0.7, tracking_confidence=0.7)
+    renderer = UIRenderer()
+
+    cap = cv2.VideoCapture(path if source == "video" and path else camera)
+
+    if not cap.isOpened():
+        sink.update_state(running=False)
+        return
+
+    # ── Headless калибровка — кадры идут прямо в браузер ──────────────────
+    sink.update_state(feedback="Calibrating: stand straight...")
+    calibrator = Calibrator(detector)
+    thresholds = calibrator.run_headless(cap, sink.publish_frame)
+
+    # Тот же счётчик повторений, что в приложении и batch_analyzer
+    reps             = RepCounter(thresholds["up_angle"], thresholds["down_angle"])
+    SQUAT_DOWN_ANGLE = reps.dn_thresh
+
+    sink.update_state(feedback="Calibration complete! Start squatting.")
+
+    frame_no             = 0
+    camera_warning_timer = 0
+    last_cam_deviation   = 0
+
+    while not sink.stopped():
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame_no += 1
+        results   = detector.process_frame(frame)
+        lm_array  = landmarks_array(results)
+        detector.draw_skeleton(frame, results)
+
+        leg       = get_best_leg(results)
+        landmarks = detector.get_landmarks(results, frame.shape, leg=leg)
+
+        feedback   = "Stand in front of camera"
+        color      = renderer.COLOR_YELLOW
+        angle      = 0
+        warnings   = []
+        back_angle = 0
+        back_ok    = True
+
+        if landmarks:
+            shoulder = landmarks["shoulder"]
+            hip      = landmarks["hip"]
+            knee     = landmarks["knee"]
+            ankle    = landmarks["ankle"]
+
+            cam_pos, cam_dev = estimate_camera_angle({
+                "left_hip_z":  landmarks["left_hip_z"],
+                "right_hip_z": landmarks["right_hip_z"]
+            })
+            if cam_pos == "diagonal":
+                last_cam_deviation   = cam_dev
+                camera_warning_timer = 90
+
+            angle      = calculate_angle_3d(landmarks["hip_3d"], landmarks["knee_3d"], landmarks["ankle_3d"])
+            back_angle = calculate_back_angle(shoulder, hip)
+            knee_dev   = calculate_knee_deviation_3d(landmarks["knee_3d"], landmarks["ankle_3d"], landmarks["hip_3d"])
+
+            back_ok = back_angle <= 35
+
+            if not back_ok and reps.stage == DOWN:
+                warnings.append("! Round back")
+            if knee_dev < -0.15 and reps.stage == DOWN:
+                warnings.append("! Knees caving in")
+
+            events = reps.update(angle, frame_no)
+            sink.update_state(counter=reps.counter, stage=reps.stage)
+            color  = renderer.COLOR_GREEN
+            if events and events[0].kind == REP:
+                sink.publish_event("rep", {"counter": reps.counter, "min_angle": int(events[0].min_angle)})
+                feedback = "Great! Stand up!"
+            elif events and events[0].kind == SHALLOW_REP:
+                sink.publish_event("shallow_rep", {"counter": reps.counter, "min_angle": int(events[0].min_angle)})
+                feedback = f"Not deep enough! Min: {int(events[0].min_angle)} deg"
+                color    = renderer.COLOR_RED
+            elif reps.stage == DOWN and reps.min_angle <= SQUAT_DOWN_ANGLE:
+                feedback = "Great depth! Stand up!"
+            elif reps.stage == DOWN:
+                feedback = f"Lower! Need < {int(SQUAT_DOWN_ANGLE)} deg"
+                color    = renderer.COLOR_RED
+            else:
+                feedback = "Good! Go down!"
+
+            renderer.draw_joint_lines(frame, hip, knee, ankle, color)
+            renderer.draw_angle(frame, knee, angle, color)
+            renderer.draw_back_angle(frame, back_angle, back_ok)
+
+            if camera_warning_timer > 0:
+                renderer.draw_camera_warning(frame, last_cam_deviation)
+                camera_warning_timer -= 1
+
+        renderer.draw_header(frame, state["counter"], state["stage"])
+        renderer.draw_feedback(frame, feedback, color)
+        renderer.draw_form_warnings(frame, warnings)
+
+        # Обновляем state и уведомляем подписчиков
+        sink.update_state(angle=int(angle), feedback=feedback, warnings=warnings,
+                          back_angle=int(back_angle), back_ok=back_ok)
+
+        # Отправляем кадр в браузерный стрим (JPEG — только для зрителей)
+        sink.publish_frame(frame, lm_array)
+
+    cap.release()
+    sink.update_state(running=False, stage=None)
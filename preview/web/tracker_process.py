@@ -0,0 +1,224 @@
+import time
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tracker import NUM_LANDMARKS, initial_state
+
+# ── Трекер в отдельном процессе ───────────────────────────────────────────
+# Дочерний процесс держит камеру, PoseDetector и рисование; процесс Flask
+# только раздаёт результат. Кадры и landmarks не пиклятся: дочерний процесс
+# пишет их в кольцо слотов multiprocessing.shared_memory, а по очереди
+# передаются только короткие сообщения (номер кадра, слот, изменения state).
+
+STOP_TIMEOUT = 5.0   # сек: столько ждём сам остановившийся процесс, потом завершаем его
+SLOTS = 4   # кадр в слоте живёт SLOTS-1 следующих кадров — хватает, чтобы его скопировать
+
+
+class SharedFrameRing:
+    """Кольцо из SLOTS кадров BGR фиксированного размера плюс landmarks (33, 4) к каждому.
+
+    Раскладка блока: seq[SLOTS] int64 | present[SLOTS] int64 | landmarks[SLOTS,33,4] f32 | кадры.
+    seq слота работает как seqlock: -1 пока слот пишется, затем номер кадра.
+    Читатель сверяет seq до и после копирования и отбрасывает перезаписанный слот."""
+
+    def __init__(self, shm, height, width):
+        self.shm    = shm
+        self.height = height
+        self.width  = width
+        buf, off    = shm.buf, 0
+        self.seq       = np.ndarray((SLOTS,), np.int64, buf, off);  off += 8 * SLOTS
+        self.present   = np.ndarray((SLOTS,), np.int64, buf, off);  off += 8 * SLOTS
+        self.landmarks = np.ndarray((SLOTS, NUM_LANDMARKS, 4), np.float32, buf, off)
+        off += 4 * SLOTS * NUM_LANDMARKS * 4
+        self.frames    = np.ndarray((SLOTS, height, width, 3), np.uint8, buf, off)
+
+    @staticmethod
+    def nbytes(height, width):
+        return SLOTS * (16 + NUM_LANDMARKS * 4 * 4 + height * width * 3)
+
+    @classmethod
+    def create(cls, height, width):
+        ring = cls(shared_memory.SharedMemory(create=True, size=cls.nbytes(height, width)), height, width)
+        ring.seq[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, height, width):
+        # Дочерний процесс (spawn) делит resource_tracker с родителем, поэтому
+        # повторная регистрация блока безвредна, а удаляет его владелец — unlink()
+        return cls(shared_memory.SharedMemory(name=name), height, width)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, seq, frame, landmarks):
+        """Пишет кадр в слот seq % SLOTS. Возвращает слот или None, если размер кадра другой."""
+        if frame.shape != self.frames.shape[1:]:
+            return None
+        k = seq % SLOTS
+        self.seq[k] = -1
+        self.frames[k] = frame
+        if landmarks is not None:
+            self.landmarks[k] = landmarks
+        self.present[k] = landmarks is not None
+        self.seq[k] = seq
+        return k
+
+    def read_landmarks(self, k, seq):
+        """Копия landmarks слота или None (нет позы или слот уже перезаписан)."""
+        if self.seq[k] != seq or not self.present[k]:
+            return None
+        lm = self.landmarks[k].copy()
+        return lm if self.seq[k] == seq else None
+
+    def read_frame(self, k, seq):
+        """Копия кадра слота или None, если его успели перезаписать."""
+        if self.seq[k] != seq:
+            return None
+        frame = self.frames[k].copy()
+        return frame if self.seq[k] == seq else None
+
+    def close(self):
+        # Сначала отпускаем numpy-представления, иначе mmap не закрыть
+        self.seq = self.present = self.landmarks = self.frames = None
+        self.shm.close()
+
+
+class ProcessSink:
+    """Sink для run_tracker внутри дочернего процесса."""
+
+    def __init__(self, out, stop, attached):
+        self.state     = initial_state()
+        self._out      = out
+        self._stop     = stop
+        self._attached = attached
+        self._ring     = None
+        self._seq      = 0
+
+    def stopped(self):
+        return self._stop.is_set()
+
+    def update_state(self, **fields):
+        # Локальная копия state нужна самому трекеру (stage, counter);
+        # родителю уходят только изменения
+        changed = {k: v for k, v in fields.items() if self.state.get(k) != v}
+        if changed:
+            self.state.update(changed)
+            self._out.put(("state", changed))
+
+    def publish_event(self, name, data):
+        self._out.put(("event", name, data))
+
+    def publish_frame(self, frame, landmarks=None):
+        if self._ring is None:
+            h, w = frame.shape[:2]
+            self._ring = SharedFrameRing.create(h, w)
+            self._out.put(("open", self._ring.name, h, w))
+            # Ждём, пока родитель подключится, иначе блок может исчезнуть раньше
+            self._attached.wait(5.0)
+        self._seq += 1
+        k = self._ring.write(self._seq, frame, landmarks)
+        if k is not None:
+            self._out.put(("frame", self._seq, k))
+
+    def close(self):
+        if self._ring is not None:
+            shm = self._ring.shm
+            self._ring.close()
+            shm.unlink()
+            self._ring = None
+
+
+def tracker_main(out, stop, attached, source, path, camera):
+    """Точка входа дочернего процесса."""
+    from tracker import run_tracker
+    sink = ProcessSink(out, stop, attached)
+    try:
+        run_tracker(sink, source, path, camera)
+    finally:
+        sink.close()
+        out.put(("end",))
+
+
+class ProcessTracker:
+    """Запускает трекер сессии в отдельном процессе и переносит его вывод в Session.
+
+    Поток-насос в процессе Flask читает сообщения дочернего процесса: изменения
+    state и события уходят в Session как есть, landmarks копируются из общей
+    памяти на каждом кадре, а сам кадр — только когда стрим кто-то смотрит."""
+
+    def __init__(self, session, source, path="", camera=0):
+        # spawn — одинаково на Windows и Linux; fork процесса с потоками Flask небезопасен
+        ctx = mp.get_context("spawn")
+        self.session   = session
+        self._out      = ctx.Queue()
+        self._stop     = ctx.Event()
+        self._attached = ctx.Event()
+        self._proc     = ctx.Process(target=tracker_main,
+                                     args=(self._out, self._stop, self._attached, source, path, camera),
+                                     name=f"tracker-{session.id}", daemon=True)
+        self._stop_at  = None
+        self._proc.start()
+        threading.Thread(target=self._pump, name=f"tracker-pump-{session.id}", daemon=True).start()
+
+    def stop(self):
+        self._stop_at = time.monotonic()
+        self._stop.set()
+
+    def stopped(self):
+        return self._stop.is_set()
+
+    def _pump(self):
+        session, ring = self.session, None
+        try:
+            while True:
+                try:
+                    msg = self._out.get(timeout=0.5)
+                except queue.Empty:
+                    if not self._proc.is_alive():
+                        break
+                    # Калибровка не проверяет остановку — не ждём её бесконечно
+                    if self._stop_at and time.monotonic() - self._stop_at > STOP_TIMEOUT:
+                        self._proc.terminate()
+                    continue
+
+                kind = msg[0]
+                if kind == "end":
+                    break
+                if kind == "open":
+                    ring = SharedFrameRing.attach(*msg[1:])
+                    self._attached.set()
+                    continue
+                # После stop() дочерний процесс ещё может досылать старое — не пишем его
+                if self.stopped():
+                    continue
+                if kind == "state":
+                    session.update_state(**msg[1])
+                elif kind == "event":
+                    session.events.publish(msg[1], msg[2])
+                elif kind == "frame" and ring is not None:
+                    seq, k = msg[1], msg[2]
+                    session.landmarks = ring.read_landmarks(k, seq)
+                    if session.frames.viewers:
+                        frame = ring.read_frame(k, seq)
+                        if frame is not None:
+                            session.frames.publish(frame)
+        finally:
+            self._proc.join(timeout=2.0)
+            if ring is not None:
+                shm = ring.shm
+                ring.close()
+                # Процесс, завершённый снаружи, не успел удалить свой блок
+                if self._proc.exitcode not in (0, None):
+                    try:
+                        shm.unlink()
+                    except FileNotFoundError:
+                        pass
+            # Процесс упал, не дослав финальный state
+            if not self.stopped() and session.running:
+                session.update_state(running=False, stage=None)
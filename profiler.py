@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+
+# Per-frame stages of the analysis loop, in pipeline order
+STAGES = ("capture", "convert", "inference", "landmarks", "math", "overlay", "handoff")
+
+
+class StageTimings:
+    """
+    Recent per-frame stage durations in fixed-size ring buffers (milliseconds).
+
+    Each stage is recorded from a single thread (capture, inference and render run
+    on different threads), so recording takes no lock; readers work on a copy and
+    at worst miss the sample being written.
+    """
+
+    def __init__(self, size=512, stages=STAGES):
+        self.stages = tuple(stages)
+        self._rows  = {s: i for i, s in enumerate(self.stages)}
+        self._buf   = np.zeros((len(self.stages), size), np.float64)
+        self._count = [0] * len(self.stages)
+        self._size  = size
+
+    def add(self, stage, seconds):
+        i = self._rows[stage]
+        n = self._count[i]
+        self._buf[i, n % self._size] = seconds * 1000.0
+        self._count[i] = n + 1
+
+    def since(self, stage, t0):
+        """Records the time since t0 (a perf_counter value) and returns the new perf_counter, for chaining."""
+        now = time.perf_counter()
+        self.add(stage, now - t0)
+        return now
+
+    def reset(self):
+        self._count = [0] * len(self.stages)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        """{stage: {"p50": ms, "p95": ms, "p99": ms, "n": samples}} for every stage with samples."""
+        out = {}
+        for stage, i in self._rows.items():
+            n = min(self._count[i], self._size)
+            if n == 0:
+                continue
+            vals = np.percentile(self._buf[i, :n], qs)
+            out[stage] = {f"p{q}": round(float(v), 2) for q, v in zip(qs, vals)}
+            out[stage]["n"] = n
+        return out
+
+
+def format_stats(stats):
+    """Fixed-width text table of percentiles() output."""
+    lines = [f"{'STAGE':<10}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+    for stage, s in stats.items():
+        lines.append(f"{stage:<10}{s['p50']:>7.1f}{s['p95']:>7.1f}{s['p99']:>7.1f}")
+    return "\n".join(lines)
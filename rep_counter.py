@@ -0,0 +1,155 @@
+"""
+Squat rep counter shared by the desktop app, the web preview and batch analysis.
+
+Relative hysteresis on the knee angle (see "Rep Counting Algorithm" in the README):
+the angle dropping below UP_THRESH enters DOWN, rising back above it leaves DOWN,
+and the deepest angle reached in between decides whether that was a rep
+(<= DN_THRESH) or a shallow rep.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+UP, DOWN = "UP", "DOWN"
+
+# Event kinds
+REP         = "rep"
+SHALLOW_REP = "shallow_rep"
+PHASE       = "phase"
+
+# A dip that stays within this many degrees of UP_THRESH is noise around the
+# threshold, not an attempted rep: it changes phase but reports no shallow rep
+SHALLOW_MIN_DEPTH = 5.0
+
+_NO_EVENTS = ()
+_STAGE_CODES = {None: 0, UP: 1, DOWN: 2}
+_STAGE_NAMES = (None, UP, DOWN)
+
+
+def thresholds(standing, squatting):
+    """UP/DN thresholds from the calibrated standing and squat knee angles."""
+    up = round(standing * 0.85, 1)
+    dn = round((standing + squatting) / 2.0, 1)
+    # Keep a minimum gap between the thresholds
+    if up - dn < 20:
+        dn = up - 20
+    return up, dn
+
+
+class RepEvent(NamedTuple):
+    kind:      str     # REP, SHALLOW_REP or PHASE
+    t:         float   # timestamp (or frame number) passed with the triggering angle
+    stage:     str     # stage after the event
+    counter:   int     # reps counted so far, including this one
+    min_angle: float   # deepest angle of the finished dip (PHASE into DOWN: the first angle)
+
+
+class RepCounter:
+    """
+    Hysteresis rep counter over a stream of knee angles.
+
+    update() takes one angle per frame and returns the events it triggered (usually
+    none); run() does the same for a whole NumPy series in a few array operations.
+    Both leave the counter in the same state, so the two can be mixed.
+    """
+
+    __slots__ = ("up_thresh", "dn_thresh", "stage", "counter", "shallow", "min_angle")
+
+    def __init__(self, up_thresh, dn_thresh):
+        self.up_thresh = float(up_thresh)
+        self.dn_thresh = float(dn_thresh)
+        self.reset()
+
+    @classmethod
+    def from_calibration(cls, standing, squatting):
+        return cls(*thresholds(standing, squatting))
+
+    def reset(self):
+        self.stage     = None   # None | UP | DOWN
+        self.counter   = 0
+        self.shallow   = 0
+        self.min_angle = 360.0  # deepest angle of the current DOWN phase
+
+    def _finish(self, t, min_angle):
+        """Classifies a finished dip; returns its event or None."""
+        if min_angle <= self.dn_thresh:
+            self.counter += 1
+            return RepEvent(REP, t, UP, self.counter, min_angle)
+        if min_angle <= self.up_thresh - SHALLOW_MIN_DEPTH:
+            self.shallow += 1
+            return RepEvent(SHALLOW_REP, t, UP, self.counter, min_angle)
+        return None
+
+    def update(self, angle, t=0.0):
+        """Feeds one angle. Returns a tuple of RepEvents, rep events before the phase change."""
+        if angle > self.up_thresh:
+            if self.stage == UP:
+                return _NO_EVENTS
+            rep = self._finish(t, self.min_angle) if self.stage == DOWN else None
+            self.stage     = UP
+            self.min_angle = 360.0
+            phase = RepEvent(PHASE, t, UP, self.counter, 360.0)
+            return (rep, phase) if rep else (phase,)
+
+        if angle < self.up_thresh:
+            if self.stage == DOWN:
+                if angle < self.min_angle:
+                    self.min_angle = angle
+                return _NO_EVENTS
+            self.stage     = DOWN
+            self.min_angle = angle
+            return (RepEvent(PHASE, t, DOWN, self.counter, angle),)
+
+        return _NO_EVENTS
+
+    def run(self, angles, t=None):
+        """
+        Feeds a whole angle series at once. t gives the timestamps (default: sample
+        indices). NaN angles are skipped, as by update(). Returns (events, down): the events in order, and a boolean array
+        that is True where the stage after that sample is DOWN.
+        """
+        a = np.asarray(angles, dtype=np.float64)
+        n = len(a)
+        t = np.arange(n) if t is None else np.asarray(t)
+        if n == 0:
+            return [], np.zeros(0, bool)
+
+        # Stage after each sample: above UP_THRESH -> UP, below -> DOWN, equal or
+        # NaN (no angle, as update() treats it) -> unchanged
+        code = np.where(a > self.up_thresh, 1, np.where(a < self.up_thresh, 2, 0))
+        last = np.maximum.accumulate(np.where(code != 0, np.arange(n), -1))
+        c0   = _STAGE_CODES[self.stage]
+        stage = np.where(last >= 0, code[np.maximum(last, 0)], c0)
+        prev  = np.concatenate(([c0], stage[:-1]))
+        down  = stage == 2
+
+        # Every DOWN run (one per dip) and its deepest angle
+        starts = np.flatnonzero(down & (prev != 2))
+        carry  = c0 == 2 and down[0]            # a dip already in progress continues
+        if carry:
+            starts = np.concatenate(([0], starts))
+        depth = np.where(down & ~np.isnan(a), a, np.inf)
+        mins  = np.minimum.reduceat(depth, starts) if len(starts) else np.empty(0)
+        if carry:
+            mins[0] = min(mins[0], self.min_angle)
+
+        events  = []
+        run_i   = 0 if carry else -1
+        stage_l = stage.tolist()
+        prev_l  = prev.tolist()
+        for i in np.flatnonzero(stage != prev).tolist():
+            s, ti = stage_l[i], t[i].item()
+            if s == 2:
+                run_i += 1
+                events.append(RepEvent(PHASE, ti, DOWN, self.counter, float(a[i])))
+                continue
+            if prev_l[i] == 2:
+                # run_i < 0: a dip from before the series ends on its first sample
+                rep = self._finish(ti, float(mins[run_i]) if run_i >= 0 else self.min_angle)
+                if rep:
+                    events.append(rep)
+            events.append(RepEvent(PHASE, ti, _STAGE_NAMES[s], self.counter, 360.0))
+
+        self.stage     = _STAGE_NAMES[stage_l[-1]]
+        self.min_angle = float(mins[-1]) if down[-1] else 360.0
+        return events, down
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 import math
+from collections import OrderedDict
 
 
 class UIRenderer:
@@ -32,29 +33,141 @@ class UIRenderer:
     FONT_MONO  = cv2.FONT_HERSHEY_DUPLEX
     FONT_PLAIN = cv2.FONT_HERSHEY_SIMPLEX
 
+    _buf    = None  # scratch memory for ROI overlays, grown on demand
+    _layers = None  # LRU of prerendered static layers, see _cached_layer
+
+    LAYER_CACHE_SIZE = 16
+
     def _blend(self, frame, overlay, alpha):
         cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
 
+    # ROI compositing: glow layers are drawn into a reused scratch buffer that
+    # covers only the primitive's bounding box, then blended back in place.
+
+    def _scratch(self, h, w):
+        n = h * w * 3
+        if self._buf is None or self._buf.size < n:
+            self._buf = np.empty(n, np.uint8)
+        return self._buf[:n].reshape(h, w, 3)
+
+    @staticmethod
+    def _clip(frame, x1, y1, x2, y2):
+        """Clips an inclusive box to the frame; returns exclusive (x1, y1, x2, y2) or None."""
+        h, w = frame.shape[:2]
+        x1, x2 = max(0, min(x1, x2)), min(w, max(x1, x2) + 1)
+        y1, y2 = max(0, min(y1, y2)), min(h, max(y1, y2) + 1)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        return x1, y1, x2, y2
+
+    def _layer(self, frame, box, alpha, draw):
+        """Blends one overlay layer inside box. draw(ov, ox, oy) paints in ROI coords (offset ox, oy)."""
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        roi = frame[y1:y2, x1:x2]
+        ov  = self._scratch(y2 - y1, x2 - x1)
+        np.copyto(ov, roi)
+        draw(ov, x1, y1)
+        cv2.addWeighted(ov, alpha, roi, 1 - alpha, 0, roi)
+
+    def _tint(self, frame, box, color, alpha):
+        """Blends a solid color over box."""
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        roi = frame[y1:y2, x1:x2]
+        ov  = self._scratch(y2 - y1, x2 - x1)
+        ov[:] = color
+        cv2.addWeighted(ov, alpha, roi, 1 - alpha, 0, roi)
+
+    def _outline_boxes(self, frame, x1, y1, x2, y2, pad):
+        """Non-overlapping strips covering a rectangle outline drawn with half-width pad."""
+        if y2 - y1 <= 2 * pad + 2:
+            return [self._clip(frame, x1 - pad, y1 - pad, x2 + pad, y2 + pad)]
+        return [
+            self._clip(frame, x1 - pad, y1 - pad,     x2 + pad, y1 + pad),
+            self._clip(frame, x1 - pad, y2 - pad,     x2 + pad, y2 + pad),
+            self._clip(frame, x1 - pad, y1 + pad + 1, x1 + pad, y2 - pad - 1),
+            self._clip(frame, x2 - pad, y1 + pad + 1, x2 + pad, y2 - pad - 1),
+        ]
+
+    def _text_box(self, frame, text, org, font, scale, thick):
+        (tw, th), base = cv2.getTextSize(text, font, scale, thick)
+        pad = thick // 2 + 2
+        return self._clip(frame, org[0] - pad, org[1] - th - pad, org[0] + tw + pad, org[1] + base + pad)
+
+    # Static layers: chrome that only depends on size/color is rendered once onto a
+    # black and a white canvas. For blend-only drawing, black gives the premultiplied
+    # color and white - black gives 255 * (1 - alpha), so each later frame needs a
+    # single multiply + add instead of redrawing.
+
+    def _cached_layer(self, key, w, h, draw):
+        if self._layers is None:
+            self._layers = OrderedDict()
+        layer = self._layers.get(key)
+        if layer is not None:
+            self._layers.move_to_end(key)
+            return layer
+
+        black = np.zeros((h, w, 3), np.uint8)
+        white = np.full((h, w, 3), 255, np.uint8)
+        draw(black)
+        draw(white)
+        inv = cv2.subtract(white, black)
+
+        # Keep only the bounding box of pixels the layer changes
+        touched = (black.max(axis=2) > 0) | (inv.min(axis=2) < 255)
+        ys, xs  = np.nonzero(touched.any(axis=1))[0], np.nonzero(touched.any(axis=0))[0]
+        if len(ys):
+            y0, y1, x0, x1 = ys[0], ys[-1] + 1, xs[0], xs[-1] + 1
+            layer = (int(x0), int(y0), black[y0:y1, x0:x1].copy(), inv[y0:y1, x0:x1].copy())
+        else:
+            layer = (0, 0, None, None)
+
+        self._layers[key] = layer
+        if len(self._layers) > self.LAYER_CACHE_SIZE:
+            self._layers.popitem(last=False)
+        return layer
+
+    def _composite(self, frame, layer, x, y):
+        lx, ly, premul, inv = layer
+        if premul is None:
+            return
+        x, y   = x + lx, y + ly
+        lh, lw = premul.shape[:2]
+        box = self._clip(frame, x, y, x + lw - 1, y + lh - 1)
+        if box is None:
+            return
+        x1, y1, x2, y2 = box
+        roi = frame[y1:y2, x1:x2]
+        sy, sx = slice(y1 - y, y2 - y), slice(x1 - x, x2 - x)
+        cv2.multiply(roi, inv[sy, sx], roi, scale=1 / 255)
+        cv2.add(roi, premul[sy, sx], roi)
+
     def _fill_rect(self, frame, x1, y1, x2, y2, color, alpha=1.0):
         if alpha >= 1.0:
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, -1)
         else:
-            ov = frame.copy()
-            cv2.rectangle(ov, (x1, y1), (x2, y2), color, -1)
-            self._blend(frame, ov, alpha)
+            self._tint(frame, self._clip(frame, x1, y1, x2, y2), color, alpha)
 
     def _glow_line(self, frame, p1, p2, color, thickness=1, glow_layers=3):
         for i in range(glow_layers, 0, -1):
-            ov = frame.copy()
-            cv2.line(ov, p1, p2, color, thickness + i * 2, cv2.LINE_AA)
-            self._blend(frame, ov, 0.10 * i)
+            t   = thickness + i * 2
+            pad = t // 2 + 2
+            box = self._clip(frame, min(p1[0], p2[0]) - pad, min(p1[1], p2[1]) - pad,
+                             max(p1[0], p2[0]) + pad, max(p1[1], p2[1]) + pad)
+            self._layer(frame, box, 0.10 * i, lambda ov, ox, oy:
+                cv2.line(ov, (p1[0] - ox, p1[1] - oy), (p2[0] - ox, p2[1] - oy), color, t, cv2.LINE_AA))
         cv2.line(frame, p1, p2, color, thickness, cv2.LINE_AA)
 
     def _glow_rect(self, frame, x1, y1, x2, y2, color, thickness=1, glow=3):
         for i in range(glow, 0, -1):
-            ov = frame.copy()
-            cv2.rectangle(ov, (x1 - i, y1 - i), (x2 + i, y2 + i), color, thickness + i * 2)
-            self._blend(frame, ov, 0.08 * i)
+            t   = thickness + i * 2
+            rx1, ry1, rx2, ry2 = x1 - i, y1 - i, x2 + i, y2 + i
+            for box in self._outline_boxes(frame, rx1, ry1, rx2, ry2, t // 2 + 1):
+                self._layer(frame, box, 0.08 * i, lambda ov, ox, oy:
+                    cv2.rectangle(ov, (rx1 - ox, ry1 - oy), (rx2 - ox, ry2 - oy), color, t))
         cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
 
     def _corner_hud(self, frame, x1, y1, x2, y2, color, size=18, thick=2, glow=True):
@@ -64,29 +177,47 @@ class UIRenderer:
             [(x1, y2 - size), (x1, y2), (x1 + size, y2)],
             [(x2 - size, y2), (x2, y2), (x2, y2 - size)],
         ]
-        for pts in segs:
+        pad = (thick + 6) // 2 + 2
+        for i, pts in enumerate(segs):
             arr = np.array(pts)
-            if glow:
-                for gi in range(3, 0, -1):
-                    ov = frame.copy()
-                    cv2.polylines(ov, [arr], False, color, thick + gi * 2, cv2.LINE_AA)
-                    self._blend(frame, ov, 0.07 * gi)
-            cv2.polylines(frame, [arr], False, color, thick, cv2.LINE_AA)
+            if not glow:
+                cv2.polylines(frame, [arr], False, color, thick, cv2.LINE_AA)
+                continue
+            # Glowing bracket: same pixels for every corner of this shape, so prerender it
+            ox, oy = arr.min(axis=0) - pad
+            local  = arr - (ox, oy)
+            layer  = self._cached_layer(("corner", i, size, thick, color), size + 2 * pad + 1,
+                                        size + 2 * pad + 1, lambda c: self._bracket(c, local, color, thick))
+            self._composite(frame, layer, int(ox), int(oy))
+
+    def _bracket(self, frame, arr, color, thick):
+        (bx1, by1), (bx2, by2) = arr.min(axis=0), arr.max(axis=0)
+        for gi in range(3, 0, -1):
+            t   = thick + gi * 2
+            pad = t // 2 + 2
+            box = self._clip(frame, bx1 - pad, by1 - pad, bx2 + pad, by2 + pad)
+            self._layer(frame, box, 0.07 * gi, lambda ov, ox, oy:
+                cv2.polylines(ov, [arr - (ox, oy)], False, color, t, cv2.LINE_AA))
+        cv2.polylines(frame, [arr], False, color, thick, cv2.LINE_AA)
 
     def _scanlines(self, frame, y1, y2, x1=0, x2=None, alpha=0.06):
         if x2 is None:
             x2 = frame.shape[1]
-        ov = frame.copy()
-        for y in range(y1, y2, 4):
-            cv2.line(ov, (x1, y), (x2, y), (0, 0, 0), 1)
-        self._blend(frame, ov, alpha)
+        # Black 1px lines blended at alpha == darkening every 4th row in place
+        rows = frame[max(0, y1):y2:4, max(0, x1):x2 + 1]
+        cv2.convertScaleAbs(rows, rows, 1 - alpha)
 
     def _dot_grid(self, frame, x1, y1, x2, y2, spacing=28, alpha=0.45):
-        ov = frame.copy()
-        for gx in range(x1, x2, spacing):
-            for gy in range(y1, y2, spacing):
-                cv2.circle(ov, (gx, gy), 1, self.C_NEON_DIM, -1)
-        self._blend(frame, ov, alpha)
+        w, h = x2 - x1 + 2, y2 - y1 + 2
+
+        def render(canvas):
+            def dots(ov, ox, oy):
+                for gx in range(0, w - 2, spacing):
+                    for gy in range(0, h - 2, spacing):
+                        cv2.circle(ov, (gx - ox, gy - oy), 1, self.C_NEON_DIM, -1)
+            self._layer(canvas, (0, 0, w, h), alpha, dots)
+
+        self._composite(frame, self._cached_layer(("dots", w, h, spacing, alpha), w, h, render), x1, y1)
 
     def _text(self, frame, text, x, y, font=None, scale=0.6, color=None, thick=1, shadow=True):
         if font  is None: font  = self.FONT_PLAIN
@@ -209,9 +340,9 @@ class UIRenderer:
             if a == 1.0:
                 cv2.circle(frame, (cx, cy), r, color, -1, cv2.LINE_AA)
             else:
-                ov = frame.copy()
-                cv2.circle(ov, (cx, cy), r, color, -1, cv2.LINE_AA)
-                self._blend(frame, ov, a)
+                box = self._clip(frame, cx - r - 1, cy - r - 1, cx + r + 1, cy + r + 1)
+                self._layer(frame, box, a, lambda ov, ox, oy:
+                    cv2.circle(ov, (cx - ox, cy - oy), r, color, -1, cv2.LINE_AA))
         self._text(frame, feedback, 32, h-16, self.FONT_PLAIN, 0.72, color, 2)
 
     # Back angle
@@ -275,11 +406,27 @@ class UIRenderer:
 
     def draw_source_selection(self, frame, selected=0, mouse_pos=None):
         h, w, _ = frame.shape
+        ph = 355
+        py1 = h//2-ph//2-10
+
+        # Everything but the buttons is static for a given frame size
+        self._composite(frame, self._cached_layer(("source", w, h), w, h, self._source_chrome), 0, 0)
+
+        # Buttons
+        options = ["WEBCAM", "VIDEO FILE"]
+        btn_rects = []
+        for i, label in enumerate(options):
+            bx1 = w//2-180; bx2 = w//2+180
+            by1 = py1+102+i*92; by2 = by1+60
+            btn_rects.append((bx1, by1, bx2, by2))
+            self.draw_button(frame, label, bx1, by1, bx2, by2, mouse_pos, 'primary')
+        return btn_rects
+
+    def _source_chrome(self, frame):
+        h, w, _ = frame.shape
 
         # Background
-        ov = np.zeros_like(frame, dtype=np.uint8)
-        ov[:] = self.C_BG
-        cv2.addWeighted(ov, 0.96, frame, 0.04, 0, frame)
+        self._tint(frame, (0, 0, w, h), self.C_BG, 0.96)
         self._dot_grid(frame, 0, 0, w, h, 28, alpha=0.55)
 
         # Screen corner decorations
@@ -300,44 +447,59 @@ class UIRenderer:
         self._corner_hud(frame, px1, py1, px2, py2, self.C_NEON, size=20, thick=2)
 
         # Top accent strip
-        ov2 = frame.copy()
-        cv2.rectangle(ov2, (px1, py1), (px2, py1+3), self.C_NEON, -1)
-        self._blend(frame, ov2, 0.9)
+        self._fill_rect(frame, px1, py1, px2, py1+3, self.C_NEON, alpha=0.9)
         cv2.rectangle(frame, (px1, py1), (px2, py1+3), self.C_NEON, -1)
 
         # Title with neon glow
         title = "AI FITNESS COACH"
-        tw = cv2.getTextSize(title, self.FONT_MONO, 1.15, 2)[0][0]
+        tw  = cv2.getTextSize(title, self.FONT_MONO, 1.15, 2)[0][0]
+        org = (w//2-tw//2, py1+50)
         for gi in range(3, 0, -1):
-            ov3 = frame.copy()
-            cv2.putText(ov3, title, (w//2-tw//2, py1+50), self.FONT_MONO, 1.15, self.C_NEON, 2+gi*2, cv2.LINE_AA)
-            self._blend(frame, ov3, 0.06*gi)
-        cv2.putText(frame, title, (w//2-tw//2, py1+50), self.FONT_MONO, 1.15, self.C_NEON, 2, cv2.LINE_AA)
+            t = 2+gi*2
+            self._layer(frame, self._text_box(frame, title, org, self.FONT_MONO, 1.15, t), 0.06*gi,
+                lambda ov, ox, oy: cv2.putText(ov, title, (org[0]-ox, org[1]-oy), self.FONT_MONO, 1.15, self.C_NEON, t, cv2.LINE_AA))
+        cv2.putText(frame, title, org, self.FONT_MONO, 1.15, self.C_NEON, 2, cv2.LINE_AA)
 
         self._text_c(frame, "SELECT INPUT SOURCE", w//2, py1+72, self.FONT_PLAIN, 0.48, self.C_MUTED, 1)
         self._glow_line(frame, (px1+20, py1+84), (px2-20, py1+84), self.C_NEON_DIM, 1, 1)
 
-        # Buttons
-        options = ["WEBCAM", "VIDEO FILE"]
-        btn_rects = []
-        for i, label in enumerate(options):
-            bx1 = w//2-180; bx2 = w//2+180
-            by1 = py1+102+i*92; by2 = by1+60
-            btn_rects.append((bx1, by1, bx2, by2))
-            self.draw_button(frame, label, bx1, by1, bx2, by2, mouse_pos, 'primary')
-        return btn_rects
-
     # Calibration overlay
 
     def draw_calibration_overlay(self, frame, phase, countdown, angle=None):
         h, w, _ = frame.shape
-        color       = self.C_NEON if phase == "UP" else self.C_BLUE
+        color = self.C_NEON if phase == "UP" else self.C_BLUE
+
+        # Dimmed frame, border and instruction panel only change with the phase
+        self._composite(frame, self._cached_layer(("calib", w, h, phase), w, h,
+                        lambda c: self._calibration_chrome(c, phase, color)), 0, 0)
+
+        if countdown > 0:
+            txt = str(countdown)
+            cw, ch = cv2.getTextSize(txt, self.FONT_MONO, 5.5, 5)[0]
+            org = (w//2-cw//2, h//2+72)
+            pad = 16
+            lw, lh = cw+2*pad, ch+2*pad
+            layer = self._cached_layer(("digit", txt, color), lw, lh,
+                                       lambda c: self._countdown_digit(c, txt, (pad, pad+ch), color))
+            self._composite(frame, layer, org[0]-pad, org[1]-ch-pad)
+        else:
+            self._text_c(frame, "MEASURING...", w//2, h//2+20, self.FONT_MONO, 1.0, color, 2)
+            if angle is not None:
+                self._text_c(frame, f"{int(angle)} DEG", w//2, h//2+60, self.FONT_PLAIN, 0.85, self.C_WHITE, 2)
+
+    def _countdown_digit(self, frame, txt, org, color):
+        for gi in range(4, 0, -1):
+            t = 5+gi*2
+            self._layer(frame, self._text_box(frame, txt, org, self.FONT_MONO, 5.5, t), 0.06*gi,
+                lambda ov, ox, oy: cv2.putText(ov, txt, (org[0]-ox, org[1]-oy), self.FONT_MONO, 5.5, color, t, cv2.LINE_AA))
+        cv2.putText(frame, txt, org, self.FONT_MONO, 5.5, color, 5, cv2.LINE_AA)
+
+    def _calibration_chrome(self, frame, phase, color):
+        h, w, _ = frame.shape
         instruction = "STAND STRAIGHT" if phase == "UP" else "SQUAT DOWN"
         step_label  = "STEP 1 OF 2"   if phase == "UP" else "STEP 2 OF 2"
 
-        ov = frame.copy()
-        cv2.rectangle(ov, (0, 0), (w, h), self.C_BG, -1)
-        self._blend(frame, ov, 0.62)
+        self._tint(frame, (0, 0, w, h), self.C_BG, 0.62)
         self._scanlines(frame, 0, h, alpha=0.07)
         self._glow_rect(frame, 0, 0, w-1, h-1, color, 2, 3)
         self._corner_hud(frame, 8, 8, w-8, h-8, color, 22, 2)
@@ -347,16 +509,4 @@ class UIRenderer:
         iw = cv2.getTextSize(instruction, self.FONT_MONO, 1.7, 3)[0][0]
         self._fill_rect(frame, w//2-iw//2-20, h//2-118, w//2+iw//2+20, h//2-68, self.C_PANEL, 0.88)
         self._glow_rect(frame, w//2-iw//2-20, h//2-118, w//2+iw//2+20, h//2-68, color, 1, 2)
-        self._text(frame, instruction, w//2-iw//2, h//2-74, self.FONT_MONO, 1.7, color, 3)
-
-        if countdown > 0:
-            cw = cv2.getTextSize(str(countdown), self.FONT_MONO, 5.5, 5)[0][0]
-            for gi in range(4, 0, -1):
-                ov2 = frame.copy()
-                cv2.putText(ov2, str(countdown), (w//2-cw//2, h//2+72), self.FONT_MONO, 5.5, color, 5+gi*2, cv2.LINE_AA)
-                self._blend(frame, ov2, 0.06*gi)
-            cv2.putText(frame, str(countdown), (w//2-cw//2, h//2+72), self.FONT_MONO, 5.5, color, 5, cv2.LINE_AA)
-        else:
-            self._text_c(frame, "MEASURING...", w//2, h//2+20, self.FONT_MONO, 1.0, color, 2)
-            if angle is not None:
-                self._text_c(frame, f"{int(angle)} DEG", w//2, h//2+60, self.FONT_PLAIN, 0.85, self.C_WHITE, 2)
\ No newline at end of file
+        self._text(frame, instruction, w//2-iw//2, h//2-74, self.FONT_MONO, 1.7, color, 3)
\ No newline at end of file